@@ -39,13 +39,15 @@ FIELD_CONFIGS = {
             "x": 2397,
             "y": 732,
             "width": 12,
-            "height": 11
+            "height": 11,
+            "preprocess_profile": "full"
         },
         "away_score_region": {
             "x": 2450,
             "y": 736,
             "width": 12,
-            "height": 11
+            "height": 11,
+            "preprocess_profile": "full"
         },
         "zoom_factor": 4.0,
         "rotation_angle": 30,
@@ -56,13 +58,15 @@ FIELD_CONFIGS = {
             "x": 1050,
             "y": 599,
             "width": 14,
-            "height": 11
+            "height": 11,
+            "preprocess_profile": "full"
         },
         "away_score_region": {
             "x": 1104,
             "y": 600,
             "width": 14,
-            "height": 11
+            "height": 11,
+            "preprocess_profile": "full"
         },
         "zoom_factor": 3.0,
         "rotation_angle": -30,
@@ -76,6 +80,34 @@ RECORDING_FPS = 30
 VIDEO_SIZE = '1920x1080'
 VIDEO_WIDTH = 1920
 VIDEO_HEIGHT = 1080
+SEGMENT_DURATION = 30
+STREAM_CAPTURE = config.get_user_settings("STREAM_CAPTURE", False)  # Analyze VOD games segment by segment while recording
+LIVE_MODE = config.get_user_settings("LIVE_MODE", False)  # Record games live instead of from VOD
+CAPTURE_BACKEND = config.get_user_settings("CAPTURE_BACKEND")  # "avfoundation", "x11grab" or "replay"; None picks by platform
+CAPTURE_DISPLAY = config.get_user_settings("CAPTURE_DISPLAY", ":0.0")  # X display grabbed by x11grab
+CAPTURE_REGION = config.get_user_settings("CAPTURE_REGION")  # [x, y, width, height] grabbed by x11grab; None = whole screen
+REPLAY_FILE = config.get_user_settings("REPLAY_FILE")  # Recording played back at real-time pace by the replay backend
+ROI_STREAM = config.get_user_settings("ROI_STREAM", True)  # Also record a lossless scoreboard-only stream for analysis
+LIVE_RING_MINUTES = 5  # Minutes of a live capture kept on disk for goal clips
+
+# Analysis settings
+SAMPLE_RATE = 1
+INFERENCE_BATCH_SIZE = 64
+SCAN_MODE = config.get_user_settings("SCAN_MODE", "full")  # Scan of finished recordings: "full", "adaptive", "sharded" or "pipelined"
+ADAPTIVE_COARSE_RATE = 10  # Seconds between coarse samples in adaptive scans
+SHARD_WORKERS = os.cpu_count() or 1  # Worker processes for sharded analysis
+RING_SLOTS = 256  # Shared-memory slots between the decoder and classifier processes
+ROI_CHANGE_THRESHOLD = 4.0  # Mean abs pixel diff below which a score region counts as unchanged
+DIGIT_MODEL_BACKEND = config.get_user_settings("DIGIT_MODEL_BACKEND", "keras")  # "keras" or "numpy"
+ARCHIVE_ROIS = config.get_user_settings("ARCHIVE_ROIS", True)  # Keep raw score regions of each game for re-scoring
+CHECKPOINT_INTERVAL = 60  # Seconds of recording processed between resumable checkpoints
+CLIP_MODE = config.get_user_settings("CLIP_MODE", "copy")  # "copy" (snaps to keyframes) or "smart" (frame-accurate)
+
+# Score validation
+HIGH_CONFIDENCE = 0.99  # Softmax probability above which a read counts as confident
+LOW_CONFIDENCE = 0.9  # Softmax probability below which a read counts as unsure
+CONFIDENT_STABLE = 2  # Reads needed to confirm a score when every read of it is confident
+UNSURE_STABLE = 5  # Reads needed to confirm a score once any read of it is unsure
 
 # Paths
 DATA_DIR = Path("data")
@@ -84,5 +116,8 @@ CLIPS_DIR = DATA_DIR / "clips"
 METADATA_DIR = DATA_DIR / "metadata"
 LOGS_DIR = Path("logs")
 
-for directory in [RECORDINGS_DIR, CLIPS_DIR, METADATA_DIR, LOGS_DIR]:
-    directory.mkdir(parents=True, exist_ok=True)
\ No newline at end of file
+
+def ensure_directories():
+    """Create the data and log folders (kept out of import so `import config` has no side effects)"""
+    for directory in [RECORDINGS_DIR, CLIPS_DIR, METADATA_DIR, LOGS_DIR]:
+        directory.mkdir(parents=True, exist_ok=True)
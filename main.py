@@ -1,16 +1,97 @@
 import logging
 import time
+from datetime import datetime
 
 from schedule_reader import ScheduleReader
 from scrapers import LiveBarnAuth, LiveBarnVideo
-from config import LIVE_BARN_EMAIL, LIVE_BARN_PASSWORD, FIELD_CONFIGS
+from config import (LIVE_BARN_EMAIL, LIVE_BARN_PASSWORD, FIELD_CONFIGS, SAMPLE_RATE, ARCHIVE_ROIS, LIVE_MODE,
+                    STREAM_CAPTURE)
 from scrapers.driver_manager import DriverManager
 from services.live_barn_service import LiveBarnService
 from services.video_service import VideoService
-from video import VideoLoader, ScreenRecorder, ScoreboardReader, ScoreValidator
+from video import (VideoLoader, ScreenRecorder, ScoreboardReader, ScoreValidator, RoiChangeGate, ReadStore, RoiArchive,
+                   GameCheckpoint)
 from video.scoreboard_finder import ScoreboardFinder
 
 
+def record_segmented_game(live_barn_service: LiveBarnService, video_service: VideoService, game: dict, team_name: str,
+                          region_configs: list[dict], rotation_angle: int, is_home: bool, live: bool,
+                          duration: int = 55 * 60) -> list:
+    """
+    Record a game in segments and analyze each one as soon as it is closed
+
+    A goal clip is cut once the segment holding its end has been closed, so it is
+    ready about a segment after the score changed instead of after the game. Live
+    games keep only the last LIVE_RING_MINUTES on disk and get 30 seconds of
+    post-roll; VOD games keep every segment and are clipped like a full recording.
+
+    :param live: Record the live stream instead of the game's VOD
+    :param duration: Seconds to record
+    :return: Clips cut, Tuple(clip name, start, duration) in goal order
+    """
+    # 30 seconds before the validated goal, plus 30 after it when live
+    clip_duration = 60 if live else 30
+    pending, clips = [], []
+
+    live_barn_service.login()
+    try:
+        if live:
+            live_barn_service.get_live_video(game)
+        else:
+            live_barn_service.get_vod_video(game)
+
+        # Let the game load (We don't want to see the LiveBarn Navigation)
+        time.sleep(10)
+        if live:
+            started = video_service.start_live_recording(team_name, game['date'], duration)
+        else:
+            started = video_service.start_segmented_recording(team_name, game['date'], duration)
+
+        if not started:
+            raise RuntimeError("The recording did not start")
+
+        scores = video_service.stream_recording_scores(region_configs, rotation_angle, SAMPLE_RATE)
+        for timestamp, (home_score, away_score), (home_confidence, away_confidence) in scores:
+
+            home_goal, away_goal = video_service.validate_scores(home_score, away_score,
+                                                                 home_confidence, away_confidence)
+            scored, conceded = (home_goal, away_goal) if is_home else (away_goal, home_goal)
+
+            if scored:
+                score = home_score if is_home else away_score
+                pending.append((f"goal_{score}_{team_name}.mp4", timestamp - 30, clip_duration))
+
+            if conceded:
+                score = away_score if is_home else home_score
+                pending.append((f"goal_against_{score}_{team_name}.mp4", timestamp - 30, clip_duration))
+
+            # Cut every clip whose end is on disk (and, live, before the ring overwrites its start)
+            recorded_until = video_service.recorded_until()
+            for clip in [clip for clip in pending if clip[1] + clip[2] <= recorded_until]:
+                video_service.clip_goal_from_segments(*clip)
+                pending.remove(clip)
+                clips.append(clip)
+
+    finally:
+        video_service.stop_recording()
+        live_barn_service.logout()
+
+        # The recording ended (or analysis failed) inside their post-roll, so these clips stop where it does
+        for clip in pending:
+            video_service.clip_goal_from_segments(*clip)
+            clips.append(clip)
+
+    if video_service.recorded_segment_count() == 0:
+        raise RuntimeError("No segments were recorded")
+
+    return clips
+
+
+def seconds_until(datetime_str: str) -> float:
+    """Seconds from now until a schedule datetime, negative once it has passed"""
+    return (datetime.fromisoformat(datetime_str) - datetime.now()).total_seconds()
+
+
 def main():
 
     logging.basicConfig(
@@ -25,6 +106,7 @@ def main():
         return
 
     driver = DriverManager.create_driver()
+    read_store = ReadStore()
 
     try:
         live_barn_auth = LiveBarnAuth(driver, LIVE_BARN_EMAIL, LIVE_BARN_PASSWORD)
@@ -35,6 +117,7 @@ def main():
         screen_recorder = ScreenRecorder()
         video_loader = VideoLoader()
         score_validator = ScoreValidator()
+        roi_gate = RoiChangeGate()
 
         live_barn_service = LiveBarnService(live_barn_auth, live_barn_video)
         video_service = VideoService(
@@ -42,7 +125,9 @@ def main():
             scoreboard_reader,
             screen_recorder,
             video_loader,
-            score_validator)
+            score_validator,
+            roi_gate,
+            read_store=read_store)
 
         for game in games:
 
@@ -51,50 +136,122 @@ def main():
             rotation_angle = field['rotation_angle']
             is_home = game['is_home']
 
-            if is_home:
-                config = field['home_score_region']
-            else:
-                config = field['away_score_region']
+            # Both scores come out of the same decoded frame and inference batch
+            region_configs = [field['home_score_region'], field['away_score_region']]
 
-            # Log in to LiveBarn and get to the game
-            live_barn_service.login()
-            live_barn_service.get_vod_video(game)
-
-            # Screen Record the game and save it to data/recordings/{team_name}_{date}.mp4
+            # The recording lands in data/recordings/{team_name}_{date}.mp4
             team_name = game['team'].lower().replace(' ', '_')
             game_date = game['date']
             file_name = f"{team_name}_{game_date.replace('-', '')}.mp4"
+            game_id = file_name.removesuffix('.mp4')
+
+            if LIVE_MODE or STREAM_CAPTURE:
+                duration = 55 * 60
+                if LIVE_MODE:
+                    # A live stream can only be recorded while the game is played
+                    seconds_to_start = seconds_until(game['datetime'])
+                    if seconds_to_start + duration <= 0:
+                        logging.info(f"{game_id} is over, it can no longer be recorded live")
+                        continue
+
+                    if seconds_to_start > 0:
+                        logging.info(f"Waiting {seconds_to_start / 60:.0f} minutes for {game_id} to start")
+                        time.sleep(seconds_to_start)
+
+                    duration = round(min(duration, duration + seconds_to_start))
+
+                try:
+                    video_service.reset_score_validation()
+                    video_service.begin_game_reads(game_id)
+                    clips = record_segmented_game(live_barn_service, video_service, game, team_name, region_configs,
+                                                  rotation_angle, is_home, live=LIVE_MODE, duration=duration)
+                    if clips:
+                        video_service.build_reel(clips, f"{game_id}_reel.mp4")
+
+                    video_service.end_game_reads()
+                    video_service.delete_segments()
+                    schedule_reader.remove_game(game['team'], game['opponent'], game['datetime'])
 
-            # Let the game load (We don't want to see the LiveBarn Navigation)
-            time.sleep(10)
-            video_service.screen_record_for_duration(team_name, game_date, 55 * 60)
+                except Exception as e:
+                    # The game stays on the schedule
+                    logging.error(f"Segmented capture of {game_id} failed: {e}")
 
-            # Stop playing video and log out
-            live_barn_service.logout()
+                continue
 
-            # Load the video
-            sample_rate = 1
-            for timestamp, frame in video_service.stream_frames(file_name, sample_rate):
+            # A checkpoint next to an existing recording means a previous run was interrupted mid-analysis
+            checkpoint = GameCheckpoint(game_id)
+            state = checkpoint.load() if video_service.has_recording(file_name) else None
 
-                # Process frame recorded video
-                score_processed = video_service.process_to_digit(frame, config, rotation_angle)
+            try:
+                if state is None:
+                    # Log in to LiveBarn and get to the game
+                    live_barn_service.login()
+                    try:
+                        live_barn_service.get_vod_video(game)
 
-                # Get score from model
-                score = video_service.get_score(score_processed)
+                        # Let the game load (We don't want to see the LiveBarn Navigation)
+                        time.sleep(10)
+                        video_service.screen_record_for_duration(team_name, game_date, 55 * 60,
+                                                                 region_configs, rotation_angle)
+                    finally:
+                        # Stop playing video and log out, so the next game starts from a fresh session
+                        live_barn_service.logout()
 
-                # Validate score for N consecutive frames
-                is_valid_score = video_service.validate_score(score)
+                    video_service.reset_score_validation()
+                    video_service.begin_game_reads(game_id)
+                    clips, resume_after = [], None
+                else:
+                    logging.info(f"Resuming {game_id} after {state['timestamp']:.0f}s")
+                    video_service.reset_score_validation()
+                    video_service.resume_from_checkpoint(state)
+                    clips, resume_after = state['clips'], state['timestamp']
 
-                # If valid, clip previous N seconds and next M seconds and save the clip
-                if is_valid_score:
-                    goal_file_name = f"goal_{score}_{team_name}.mp4"
-                    video_service.clip_goal(file_name, goal_file_name, (timestamp - 30),30)
+                archive = RoiArchive(game_id) if ARCHIVE_ROIS else None
 
-            video_service.delete_video(file_name)
-            schedule_reader.remove_game(game['team'], game['opponent'], game['datetime'])
+                # Read both scores from the recorded video with the configured SCAN_MODE
+                scores = video_service.scan_scores(file_name, region_configs, rotation_angle, SAMPLE_RATE,
+                                                   archive=archive, resume_after=resume_after)
+                for timestamp, (home_score, away_score), (home_confidence, away_confidence) in scores:
+
+                    # Validate each team's score for N consecutive frames (fewer when the model is confident)
+                    home_goal, away_goal = video_service.validate_scores(home_score, away_score,
+                                                                         home_confidence, away_confidence)
+                    scored, conceded = (home_goal, away_goal) if is_home else (away_goal, home_goal)
+
+                    # If valid, queue a clip of the previous N seconds; all clips are cut together below
+                    if scored:
+                        score = home_score if is_home else away_score
+                        clips.append((f"goal_{score}_{team_name}.mp4", timestamp - 30, 30))
+
+                    if conceded:
+                        score = away_score if is_home else home_score
+                        clips.append((f"goal_against_{score}_{team_name}.mp4", timestamp - 30, 30))
+
+                    # A crash from here on only repeats the last CHECKPOINT_INTERVAL seconds
+                    if checkpoint.due(timestamp):
+                        video_service.save_checkpoint(checkpoint, timestamp, clips, archive)
+
+                # Keep the recording and checkpoint for the next run when a clip could not be cut
+                if not video_service.clip_goals(file_name, clips):
+                    raise RuntimeError(f"Cutting the goal clips of {game_id} failed")
+                if clips:
+                    video_service.build_reel(clips, f"{game_id}_reel.mp4")
+
+                # Keep every read so thresholds can be re-tuned after the recording is gone
+                video_service.end_game_reads()
+                checkpoint.delete()
+                video_service.delete_video(file_name)
+                schedule_reader.remove_game(game['team'], game['opponent'], game['datetime'])
+
+            except Exception as e:
+                # The checkpoint and recording stay, so the next run resumes this game
+                logging.error(f"Processing {game_id} failed: {e}")
 
     except Exception as e:
         logging.error(f"An error occurred: {e}")
 
+    finally:
+        read_store.close()
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,76 @@
+"""
+Check NumpyDigitModel against the Keras model on the labeled dataset.
+
+Run from the repository root: python -m ml.compare_numpy_model
+"""
+import os
+import sys
+
+import cv2
+import numpy as np
+from tensorflow import keras
+
+from video.numpy_digit_model import NumpyDigitModel
+from video.scoreboard_reader import ScoreboardReader
+
+DATASET_ROOT = "dataset_digits"
+KERAS_MODEL_PATH = "ml/digit_model.keras"
+NUMPY_MODEL_PATH = "ml/digit_model.npz"
+
+# float32 summation order differs between TensorFlow and NumPy
+MAX_PROBABILITY_DIFF = 1e-4
+
+
+def load_dataset(dataset_root=DATASET_ROOT):
+    """Load every labeled digit image, prepared exactly as ScoreboardReader does"""
+    arrays, labels = [], []
+
+    for digit in range(10):
+        digit_dir = os.path.join(dataset_root, str(digit))
+        for fname in sorted(os.listdir(digit_dir)):
+            if fname.endswith(".png"):
+                img = cv2.imread(os.path.join(digit_dir, fname), cv2.IMREAD_GRAYSCALE)
+                arrays.append(ScoreboardReader._prepare_digit(img))
+                labels.append(digit)
+
+    return np.concatenate(arrays), np.array(labels)
+
+
+def compare_models(keras_model, numpy_model, batch, labels):
+    """
+    Run both models over the batch and report agreement
+
+    Returns:
+        True if every prediction matches and probabilities are within tolerance
+    """
+    keras_probs = keras_model.predict(batch, batch_size=256, verbose=0)
+    numpy_probs = numpy_model.predict(batch)
+
+    keras_digits = np.argmax(keras_probs, axis=1)
+    numpy_digits = np.argmax(numpy_probs, axis=1)
+
+    max_diff = float(np.max(np.abs(keras_probs - numpy_probs)))
+    mismatches = int(np.sum(keras_digits != numpy_digits))
+
+    print(f"Images: {len(batch)}")
+    print(f"Keras accuracy: {np.mean(keras_digits == labels) * 100:.2f}%")
+    print(f"NumPy accuracy: {np.mean(numpy_digits == labels) * 100:.2f}%")
+    print(f"Prediction mismatches: {mismatches}")
+    print(f"Max probability diff: {max_diff:.2e} (limit {MAX_PROBABILITY_DIFF:.0e})")
+
+    return mismatches == 0 and max_diff <= MAX_PROBABILITY_DIFF
+
+
+def main():
+    keras_model = keras.models.load_model(KERAS_MODEL_PATH)
+    numpy_model = NumpyDigitModel(NUMPY_MODEL_PATH)
+
+    batch, labels = load_dataset()
+    passed = compare_models(keras_model, numpy_model, batch, labels)
+
+    print("PASS" if passed else "FAIL")
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -17,6 +17,10 @@ ROTATION = FIELD_CONFIGS[FIELD]['rotation_angle']
 OUTPUT_DIR = "./dataset_unsorted"
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
+# Raw score regions under the same file names, for comparing preprocessing profiles
+RAW_OUTPUT_DIR = os.path.join("./dataset_raw", FIELD.lower().replace(' ', '_'))
+os.makedirs(RAW_OUTPUT_DIR, exist_ok=True)
+
 
 def main():
     video = VideoLoader()
@@ -31,7 +35,8 @@ def main():
     for timestamp, frame in video.frames_generator(VIDEO_PATH, sample_rate=1):
         frame_index += 1
 
-        digit_img = finder.preprocess_scoreboard_region(frame, REGION, ROTATION)
+        region_img = finder.extract_region(frame, REGION, ROTATION)
+        digit_img = finder.preprocess_region(region_img, finder.preprocess_profile(REGION))
 
         if digit_img is None or digit_img.size == 0:
             print(f"Skipping empty ROI on frame {frame_index}")
@@ -42,6 +47,7 @@ def main():
         save_path = os.path.join(OUTPUT_DIR, filename)
 
         cv2.imwrite(save_path, digit_img)
+        cv2.imwrite(os.path.join(RAW_OUTPUT_DIR, filename), region_img)
         print(f"Saved: {save_path}")
 
     print("\nDone!")
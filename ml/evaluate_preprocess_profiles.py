@@ -0,0 +1,97 @@
+"""
+Compare ScoreboardFinder preprocessing profiles on the labeled dataset.
+
+Every profile is run over the raw score regions saved by ml/digit_labeler.py
+(dataset_raw/<field>/) that also have a label in dataset_digits/<digit>/.
+Accuracy and per-patch latency are printed side by side for each field, with
+the fastest profile that stays within MAX_ACCURACY_DROP of `full`.
+
+Run from the repository root: python -m ml.evaluate_preprocess_profiles
+"""
+import os
+import time
+
+import cv2
+import numpy as np
+
+from config import FIELD_CONFIGS
+from video.scoreboard_finder import ScoreboardFinder
+from video.scoreboard_reader import ScoreboardReader
+
+DATASET_ROOT = "dataset_digits"
+RAW_DATASET_ROOT = "dataset_raw"
+
+# Percentage points of accuracy a cheaper profile may lose against `full`
+MAX_ACCURACY_DROP = 0.5
+
+
+def load_labels(dataset_root=DATASET_ROOT):
+    """Map each labeled file name to its digit"""
+    labels = {}
+    for digit in range(10):
+        digit_dir = os.path.join(dataset_root, str(digit))
+        if not os.path.isdir(digit_dir):
+            continue
+
+        for fname in os.listdir(digit_dir):
+            if fname.endswith(".png"):
+                labels[fname] = digit
+
+    return labels
+
+
+def load_raw_regions(field_dir, labels):
+    """Load the raw score regions of one field that have a label"""
+    regions, digits = [], []
+    for fname in sorted(os.listdir(field_dir)):
+        if fname in labels:
+            regions.append(cv2.imread(os.path.join(field_dir, fname)))
+            digits.append(labels[fname])
+
+    return regions, np.array(digits)
+
+
+def evaluate_profile(reader, regions, digits, profile):
+    """
+    Preprocess and classify every region with one profile
+
+    :return: Tuple(accuracy in percent, preprocessing milliseconds per patch)
+    """
+    start = time.perf_counter()
+    images = [ScoreboardFinder.preprocess_region(region, profile) for region in regions]
+    latency_ms = (time.perf_counter() - start) * 1000 / len(regions)
+
+    predicted, _ = reader.predict_batch(images)
+    return float(np.mean(predicted == digits) * 100), latency_ms
+
+
+def pick_profile(results):
+    """Fastest profile whose accuracy is within MAX_ACCURACY_DROP of `full`"""
+    baseline = results[ScoreboardFinder.DEFAULT_PREPROCESS_PROFILE][0]
+    allowed = [profile for profile, (accuracy, _) in results.items() if accuracy >= baseline - MAX_ACCURACY_DROP]
+    return min(allowed, key=lambda profile: results[profile][1])
+
+
+def main():
+    field_names = {name.lower().replace(' ', '_'): name for name in FIELD_CONFIGS}
+    labels = load_labels()
+    reader = ScoreboardReader()
+
+    for field_slug in sorted(os.listdir(RAW_DATASET_ROOT)):
+        field_dir = os.path.join(RAW_DATASET_ROOT, field_slug)
+        regions, digits = load_raw_regions(field_dir, labels)
+        if not regions:
+            continue
+
+        results = {profile: evaluate_profile(reader, regions, digits, profile)
+                   for profile in ScoreboardFinder.PREPROCESS_PROFILES}
+
+        print(f"\n{field_names.get(field_slug, field_slug)}: {len(regions)} labeled regions")
+        print(f"{'profile':<10}{'accuracy':>10}{'ms/patch':>10}")
+        for profile, (accuracy, latency_ms) in results.items():
+            print(f"{profile:<10}{accuracy:>9.2f}%{latency_ms:>10.2f}")
+        print(f"Pin: \"preprocess_profile\": \"{pick_profile(results)}\"")
+
+
+if __name__ == "__main__":
+    main()
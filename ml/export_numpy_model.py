@@ -0,0 +1,75 @@
+"""
+Export digit_model.keras to a NumPy .npz for NumpyDigitModel
+"""
+import os
+import sys
+
+import numpy as np
+from tensorflow import keras
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def export_model(model_path, output_path):
+    """
+    Dump Dense kernels/biases and the layer sequence of the model
+
+    Args:
+        model_path: trained Keras model
+        output_path: .npz file to write
+
+    Returns:
+        list of ops written, e.g. ['dense', 'relu', 'dense', 'softmax']
+    """
+    model = keras.models.load_model(model_path)
+
+    ops = []
+    arrays = {}
+    dense_count = 0
+
+    for layer in model.layers:
+        layer_type = type(layer).__name__
+
+        if layer_type in ("Flatten", "InputLayer", "Dropout"):
+            continue
+
+        if layer_type == "Dense":
+            kernel, bias = layer.get_weights()
+            arrays[f"kernel_{dense_count}"] = kernel.astype(np.float32)
+            arrays[f"bias_{dense_count}"] = bias.astype(np.float32)
+            dense_count += 1
+
+            ops.append("dense")
+            ops.append(layer.get_config()["activation"])
+
+        elif layer_type == "Softmax":
+            ops.append("softmax")
+
+        elif layer_type == "Activation":
+            ops.append(layer.get_config()["activation"])
+
+        else:
+            raise ValueError(f"Layer type {layer_type} is not supported by NumpyDigitModel")
+
+    np.savez_compressed(output_path, ops=np.array(ops), **arrays)
+
+    print(f"Exported {dense_count} dense layers to {output_path}")
+    print(f"Ops: {ops}")
+
+    return ops
+
+
+def main():
+    model_path = os.path.join(SCRIPT_DIR, "digit_model.keras")
+    output_path = os.path.join(SCRIPT_DIR, "digit_model.npz")
+
+    if len(sys.argv) > 1:
+        model_path = sys.argv[1]
+    if len(sys.argv) > 2:
+        output_path = sys.argv[2]
+
+    export_model(model_path, output_path)
+
+
+if __name__ == "__main__":
+    main()
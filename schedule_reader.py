@@ -7,6 +7,10 @@ from datetime import datetime
 from pathlib import Path
 import sys
 
+from config import GITHUB_USERNAME, GITHUB_REPO, GITHUB_BRANCH, ensure_directories
+
+ensure_directories()
+
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s',
@@ -17,8 +21,6 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-from config import GITHUB_USERNAME, GITHUB_REPO, GITHUB_BRANCH
-
 SCHEDULE_URL = f"https://raw.githubusercontent.com/{GITHUB_USERNAME}/{GITHUB_REPO}/{GITHUB_BRANCH}/schedule_data.json"
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 
@@ -1,10 +1,17 @@
 """
 Web scraping modules for DaysSmart site
+
+Classes are imported on first access so that `import scrapers` does not load
+Selenium until a scraper is actually used.
 """
-from .day_smart_auth import DaySmartAuth
-from .day_smart_schedule import DaySmartSchedule
-from .live_barn_auth import LiveBarnAuth
-from .live_barn_video import LiveBarnVideo
+import importlib
+
+_MODULES = {
+    'DaySmartAuth': '.day_smart_auth',
+    'DaySmartSchedule': '.day_smart_schedule',
+    'LiveBarnAuth': '.live_barn_auth',
+    'LiveBarnVideo': '.live_barn_video',
+}
 
 __all__ = [
     'DaySmartAuth',
@@ -12,3 +19,12 @@ __all__ = [
     'LiveBarnAuth',
     'LiveBarnVideo',
 ]
+
+
+def __getattr__(name):
+    if name not in _MODULES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(_MODULES[name], __name__), name)
+    globals()[name] = value
+    return value
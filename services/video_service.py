@@ -1,8 +1,14 @@
 import logging
+import math
+import multiprocessing
 
 from numpy import ndarray
 
-from video import ScoreboardFinder, ScoreboardReader, VideoLoader, ScreenRecorder, ScoreValidator
+from config import INFERENCE_BATCH_SIZE, SCAN_MODE, RING_SLOTS, LIVE_RING_MINUTES, SEGMENT_DURATION, ROI_STREAM
+from video import (ScoreboardFinder, ScoreboardReader, VideoLoader, ScreenRecorder, ScoreValidator, RoiChangeGate,
+                   AdaptiveScanner, ShardedAnalyzer, SharedFrameRing, TeamScoreValidator, ReadStore, RoiArchive,
+                   GameCheckpoint, ReelBuilder)
+from video.field_profile import FieldProfile
 
 logger = logging.getLogger(__name__)
 
@@ -12,33 +18,419 @@ class VideoService:
                  scoreboard_reader: ScoreboardReader,
                  screen_recorder: ScreenRecorder,
                  video_loader: VideoLoader,
-                 score_validator: ScoreValidator):
+                 score_validator: ScoreValidator,
+                 roi_gate: RoiChangeGate = None,
+                 team_score_validator: TeamScoreValidator = None,
+                 read_store: ReadStore = None,
+                 reel_builder: ReelBuilder = None):
         self.scoreboard_finder = scoreboard_finder
         self.scoreboard_reader = scoreboard_reader
         self.screen_recorder = screen_recorder
         self.video_loader = video_loader
         self.score_validator = score_validator
+        self.roi_gate = roi_gate
+        self.read_store = read_store
+        self.reel_builder = reel_builder or ReelBuilder()
+        self.team_score_validator = team_score_validator or TeamScoreValidator(
+            score_validator.required_stable, score_validator.confident_stable, score_validator.unsure_stable)
+        self.adaptive_scanner = AdaptiveScanner(video_loader, scoreboard_finder, scoreboard_reader)
+        self.sharded_analyzer = ShardedAnalyzer(video_loader, backend=scoreboard_reader.backend)
 
-    def screen_record_for_duration(self, team_name: str, game_date:str, duration_seconds: int) -> bool:
-        return self.screen_recorder.record_for_duration(team_name, game_date, duration_seconds)
+    def screen_record_for_duration(self, team_name: str, game_date:str, duration_seconds: int,
+                                   region_configs: list[dict] = None, rotation_angle: int = 0) -> bool:
+        """
+        Record a game, plus a lossless stream of just its score regions when they are given
+
+        The scoreboard stream lets analysis decode a small patch per frame instead of the full recording.
+        """
+        roi_bbox, frame_size = None, None
+        if ROI_STREAM and region_configs:
+            try:
+                frame_size = self.screen_recorder.capture_backend.frame_dimensions()
+                roi_bbox = FieldProfile(rotation_angle, *frame_size).source_bbox(region_configs)
+            except Exception as e:
+                # The scoreboard stream only speeds analysis up, the game still has to be recorded
+                logger.warning(f"Recording without a scoreboard stream: {e}")
+                roi_bbox = None
+
+        return self.screen_recorder.record_for_duration(team_name, game_date, duration_seconds, roi_bbox,
+                                                        frame_size)
+
+    def start_segmented_recording(self, team_name: str, game_date: str, duration_seconds: int) -> bool:
+        return self.screen_recorder.start_segmented_recording(team_name, game_date, duration_seconds)
+
+    def start_live_recording(self, team_name: str, game_date: str, duration_seconds: int,
+                             ring_minutes: float = LIVE_RING_MINUTES) -> bool:
+        """Record a live stream as a ring of segments holding only the last `ring_minutes`"""
+        # One extra segment, since the one being written has overwritten the oldest
+        ring_size = math.ceil(ring_minutes * 60 / SEGMENT_DURATION) + 1
+        return self.screen_recorder.start_segmented_recording(team_name, game_date, duration_seconds,
+                                                              ring_size=ring_size)
+
+    def stop_recording(self) -> None:
+        self.screen_recorder.stop_recording()
+
+    def recorded_segment_count(self) -> int:
+        """Segments the current segmented recording has closed so far, read or skipped"""
+        return len(self.screen_recorder.segments)
+
+    def recorded_until(self) -> float:
+        """End of the last closed segment on disk, in seconds from the recording start"""
+        segments = self.screen_recorder.available_segments
+        return segments[-1][2] if segments else 0.0
+
+    def stream_recording_scores(self, region_configs: list[dict], rotation_angle: int, sample_rate: int = 3,
+                                batch_size: int = INFERENCE_BATCH_SIZE):
+        """
+        Read scores from a segmented recording while it is still being captured
+
+        Each segment is analyzed densely as soon as the recorder closes it. MPEG-TS
+        segments have no frame index to seek by, so SCAN_MODE does not apply here.
+
+        :return: Generator of Tuple(timestamp from recording start, scores per region, confidences per region)
+        """
+        for segment_file, start_time, _ in self.screen_recorder.closed_segments():
+            if self.read_store is not None:
+                self.read_store.timestamp_offset = start_time
+
+            segment_scores = self.stream_scores(segment_file, region_configs, rotation_angle, sample_rate, batch_size)
+
+            for timestamp, scores, confidences in segment_scores:
+                yield start_time + timestamp, scores, confidences
+
+    def clip_goal_from_segments(self, clip_name: str, start: float, duration: float) -> bool:
+        return self.video_loader.clip_segments(self.screen_recorder.available_segments, clip_name, start, duration)
+
+    def delete_segments(self) -> None:
+        self.video_loader.delete_segments(self.screen_recorder.segment_dir.name)
 
     def stream_frames(self, file_name: str, sample_rate: int = 3):
         return self.video_loader.frames_generator(file_name, sample_rate)
 
-    def process_to_digit(self, frame: ndarray, region_config: dict, rotation_angle: int) -> ndarray:
-        return self.scoreboard_finder.preprocess_scoreboard_region(frame, region_config, rotation_angle)
+    def stream_scoreboard_patches(self, file_name: str, region_configs: list[dict], rotation_angle: int,
+                                  sample_rate: int = 3, resume_after: float = None,
+                                  sample_range: tuple[int, int] = None):
+        return self.video_loader.roi_frames_generator(file_name, region_configs, rotation_angle, sample_rate,
+                                                      resume_after, sample_range)
 
-    def get_score(self, img: ndarray) -> int:
+    def process_to_digit(self, frame: ndarray, region_config: dict, rotation_angle: int,
+                         origin: tuple[int, int] = (0, 0), frame_size: tuple[int, int] = None) -> ndarray:
+        return self.scoreboard_finder.preprocess_scoreboard_region(frame, region_config, rotation_angle,
+                                                                   origin, frame_size)
+
+    def get_score(self, img: ndarray) -> tuple[int, float]:
         return self.scoreboard_reader.get_score(img)
 
-    def get_scores(self, home_img: ndarray, away_img: ndarray) -> tuple[int, int]:
+    def get_scores(self, home_img: ndarray, away_img: ndarray) -> tuple[tuple[int, float], tuple[int, float]]:
         return self.scoreboard_reader.get_scores(home_img, away_img)
 
-    def validate_score(self, score: int) -> bool:
-        return self.score_validator.validate_score(score)
+    def get_scores_batch(self, imgs: list[ndarray]) -> list[tuple[int, float]]:
+        return self.scoreboard_reader.get_scores_batch(imgs)
+
+    def stream_scores(self, file_name: str, region_configs: list[dict], rotation_angle: int,
+                      sample_rate: int = 3, batch_size: int = INFERENCE_BATCH_SIZE, archive: RoiArchive = None,
+                      resume_after: float = None, sample_range: tuple[int, int] = None):
+        """
+        Read the score in every region of each sampled frame, batching inference
+
+        Digits are accumulated across samples until `batch_size` images are pending,
+        then classified with one forward pass. With a ROI gate, regions that have not
+        changed since they were last classified reuse that read and skip both
+        preprocessing and inference.
+
+        :param file_name: Recording in the recordings folder
+        :param region_configs: Score regions to read (e.g. home and away)
+        :param rotation_angle: Degrees the regions are rotated by (neg = clockwise)
+        :param sample_rate: Seconds between samples
+        :param batch_size: Digit images per forward pass
+        :param archive: Optional RoiArchive to keep the raw score regions of every sample in
+        :param resume_after: Start after this timestamp, when resuming from a GameCheckpoint
+        :param sample_range: Tuple(first, end) sample numbers to read instead of the whole recording
+        :return: Generator of Tuple(timestamp, scores per region, confidences per region), in timestamp order
+        """
+        patches = self.stream_scoreboard_patches(file_name, region_configs, rotation_angle, sample_rate,
+                                                 resume_after, sample_range)
+        yield from self._score_patches(patches, region_configs, rotation_angle, batch_size,
+                                       archive, sample_rate, resume_after)
+
+    def scan_scores(self, file_name: str, region_configs: list[dict], rotation_angle: int, sample_rate: int = 1,
+                    archive: RoiArchive = None, resume_after: float = None, scan_mode: str = SCAN_MODE):
+        """
+        Read the scores of a finished recording with the configured scan
+
+        "full" decodes every sample, "adaptive" only the samples around score
+        changes, "sharded" splits the samples across worker processes and
+        "pipelined" decodes in a second process feeding a shared-memory ring. All
+        give the same timeline. The ROI archive is filled from the regions this
+        process classifies, so adaptive and sharded scans, which skip samples or
+        classify in other processes, do not fill it.
+
+        :param scan_mode: "full", "adaptive", "sharded" or "pipelined"
+        :return: Generator of Tuple(timestamp, scores per region, confidences per region), in timestamp order
+        """
+        if scan_mode == "full":
+            return self.stream_scores(file_name, region_configs, rotation_angle, sample_rate,
+                                      archive=archive, resume_after=resume_after)
+
+        if scan_mode == "pipelined":
+            return self.stream_scores_pipelined(file_name, region_configs, rotation_angle, sample_rate,
+                                                archive=archive, resume_after=resume_after)
+
+        if archive is not None:
+            logger.info(f"The {scan_mode} scan does not fill the ROI archive")
+
+        if scan_mode == "adaptive":
+            return self.stream_scores_adaptive(file_name, region_configs, rotation_angle, sample_rate, resume_after)
+
+        if scan_mode == "sharded":
+            return self.stream_scores_sharded(file_name, region_configs, rotation_angle, sample_rate, resume_after)
+
+        raise ValueError(f"Unknown scan mode: {scan_mode}")
+
+    def stream_scores_pipelined(self, file_name: str, region_configs: list[dict], rotation_angle: int,
+                                sample_rate: int = 3, batch_size: int = INFERENCE_BATCH_SIZE,
+                                slot_count: int = RING_SLOTS, archive: RoiArchive = None,
+                                resume_after: float = None):
+        """
+        Same as `stream_scores`, with decoding in a separate process
+
+        The decoder process writes scoreboard patches into a shared-memory ring that
+        this process reads as zero-copy views, so decoding and classification overlap.
+
+        :param slot_count: Patches the ring can hold before the decoder has to wait
+        :param archive: Optional RoiArchive to keep the raw score regions of every sample in
+        :param resume_after: Start after this timestamp, when resuming from a GameCheckpoint
+        :return: Generator of Tuple(timestamp, scores per region, confidences per region), in timestamp order
+        """
+        x, y, w, h = self.video_loader.load_roi_bbox(file_name, region_configs, rotation_angle)
+
+        context = multiprocessing.get_context("spawn")
+        ring = SharedFrameRing(slot_count, (h, w, 3), context=context)
+        decoder = context.Process(target=self.video_loader.roi_frames_to_ring,
+                                  args=(ring, file_name, region_configs, rotation_angle, sample_rate,
+                                        resume_after),
+                                  daemon=True)
+        decoder.start()
+
+        try:
+            patches = self._drain_ring(ring, decoder)
+            yield from self._score_patches(patches, region_configs, rotation_angle, batch_size,
+                                           archive, sample_rate, resume_after)
+        finally:
+            if decoder.is_alive():
+                decoder.terminate()
+            decoder.join()
+
+            logger.info(f"Frame ring: {ring.slot_count} slots of {ring.slot_bytes} bytes, "
+                        f"peak occupancy {ring.peak_occupancy}, decoder waited {ring.full_waits} times")
+            ring.close()
+
+    @staticmethod
+    def _drain_ring(ring: SharedFrameRing, decoder):
+        """Yield ring slots in order, releasing each one when the next is requested"""
+        while True:
+            try:
+                item = ring.get(timeout=5)
+            except TimeoutError:
+                if not decoder.is_alive():
+                    raise RuntimeError(f"Decoder process exited unexpectedly ({decoder.exitcode})")
+                continue
+
+            if item is None:
+                # The decoder marks the end even when it fails, only its exit code tells them apart
+                decoder.join()
+                if decoder.exitcode != 0:
+                    raise RuntimeError(f"Decoder process failed ({decoder.exitcode}), the recording was not "
+                                       f"read to the end")
+                return
+
+            yield item
+            ring.release()
+
+    def _score_patches(self, patches, region_configs: list[dict], rotation_angle: int, batch_size: int,
+                       archive: RoiArchive = None, sample_rate: int = 3, resume_after: float = None):
+        """
+        Batch-classify the score regions of a stream of Tuple(timestamp, scoreboard patch)
+
+        The rotated regions cut out for classification are also what `archive`
+        keeps, so archiving costs no extra extraction.
+        """
+        # Each read is a one-item list filled in when its batch is classified,
+        # so gate hits can share a read that is still waiting in the batch
+        pending, pending_digits, pending_reads, deferred = [], [], [], []
+        store_hashes = self.read_store is not None
+        archive_open = False
+
+        try:
+            for timestamp, patch in patches:
+                origin = self.video_loader.roi_bbox[:2]
+                frame_size = (self.video_loader.width, self.video_loader.height)
+
+                if archive is not None and not archive_open:
+                    # The recording's frame count is known once its first patch is decoded
+                    self._open_archive(archive, region_configs, sample_rate, resume_after)
+                    archive_open = True
+
+                reads, rois, roi_hashes = [], [], []
+                for region in region_configs:
+                    roi = self.scoreboard_finder.extract_region(patch, region, rotation_angle, origin, frame_size)
+                    rois.append(roi)
+                    key = (region['x'], region['y'])
+                    if store_hashes:
+                        roi_hashes.append(ReadStore.roi_hash(roi))
+
+                    read = self.roi_gate.match(key, roi) if self.roi_gate is not None else None
+                    if read is None:
+                        read = [None]
+                        profile = self.scoreboard_finder.preprocess_profile(region)
+                        if profile in ScoreboardFinder.BATCHED_PROFILES:
+                            # Preprocessed with the rest of the batch when it is classified
+                            deferred.append((len(pending_digits), roi, profile))
+                            pending_digits.append(None)
+                        else:
+                            pending_digits.append(self.scoreboard_finder.preprocess_region(roi, profile))
+                        pending_reads.append(read)
+
+                        if self.roi_gate is not None:
+                            self.roi_gate.remember(key, roi, read)
+
+                    reads.append(read)
+
+                if archive_open:
+                    archive.append(timestamp, rois)
+
+                pending.append((timestamp, reads, roi_hashes))
+
+                if len(pending_digits) >= batch_size or len(pending) >= batch_size:
+                    self._preprocess_deferred(pending_digits, deferred)
+                    yield from self._score_pending(pending, pending_digits, pending_reads)
+                    pending, pending_digits, pending_reads, deferred = [], [], [], []
+
+            self._preprocess_deferred(pending_digits, deferred)
+            yield from self._score_pending(pending, pending_digits, pending_reads)
+        finally:
+            if archive_open:
+                archive.close()
+
+        if self.roi_gate is not None:
+            logger.info(f"ROI gate: {self.roi_gate.hits} reused, {self.roi_gate.misses} classified "
+                        f"({self.roi_gate.hit_rate * 100:.1f}% hit rate)")
+
+    def _open_archive(self, archive: RoiArchive, region_configs: list[dict], sample_rate: int,
+                      resume_after: float = None) -> None:
+        """Continue `archive` when resuming, otherwise size a new one for every sample of the recording"""
+        if resume_after is not None and archive.exists():
+            archive.reopen(resume_after)
+            return
+
+        frame_interval = max(int(self.video_loader.fps * sample_rate), 1)
+        archive.create(region_configs, (self.video_loader.frame_count - 1) // frame_interval + 1)
+
+    def stream_scores_adaptive(self, file_name: str, region_configs: list[dict], rotation_angle: int,
+                               sample_rate: int = 1, resume_after: float = None):
+        scores = self.adaptive_scanner.stream_scores(file_name, region_configs, rotation_angle, sample_rate)
+        return self._store_reads(self._after(scores, resume_after))
+
+    def stream_scores_sharded(self, file_name: str, region_configs: list[dict], rotation_angle: int,
+                              sample_rate: int = 1, resume_after: float = None):
+        """Read a finished recording across a process pool, yields Tuple(timestamp, scores, confidences)"""
+        scores = self.sharded_analyzer.stream_scores(file_name, region_configs, rotation_angle, sample_rate,
+                                                     resume_after)
+        return self._store_reads(scores)
+
+    @staticmethod
+    def _after(scores, resume_after: float = None):
+        """Drop the reads up to `resume_after`, which a resumed game already has"""
+        if resume_after is None:
+            return scores
+
+        return (read for read in scores if read[0] > resume_after)
+
+    def _store_reads(self, scores):
+        """Pass Tuple(timestamp, scores, confidences) through, logging each one to the read store"""
+        for timestamp, sample_scores, confidences in scores:
+            if self.read_store is not None:
+                self.read_store.add_sample(timestamp, sample_scores, confidences)
+            yield timestamp, sample_scores, confidences
+
+    def begin_game_reads(self, game_id: str) -> None:
+        """Log every read from now on under `game_id`, if a read store is set"""
+        if self.read_store is not None:
+            self.read_store.begin_game(game_id)
+        if self.roi_gate is not None:
+            self.roi_gate.reset()
+
+    def end_game_reads(self) -> None:
+        if self.read_store is not None:
+            self.read_store.end_game()
+
+    def save_checkpoint(self, checkpoint: GameCheckpoint, timestamp: float, clips: list[tuple[str, float, float]],
+                        archive: RoiArchive = None) -> None:
+        """Persist everything up to `timestamp`: stored reads, archived regions and validator state"""
+        if self.read_store is not None:
+            self.read_store.flush()
+        if archive is not None:
+            archive.flush()
+
+        checkpoint.save(timestamp, self.team_score_validator.get_state(), clips)
+
+    def resume_from_checkpoint(self, state: dict) -> None:
+        """Restore validator state and keep the stored reads up to a loaded checkpoint"""
+        self.team_score_validator.load_state(state['validator'])
+        if self.read_store is not None:
+            self.read_store.begin_game(state['game_id'], resume_after=state['timestamp'])
+
+    def has_recording(self, file_name: str) -> bool:
+        return self.video_loader.has_recording(file_name)
+
+    def _preprocess_deferred(self, digits: list, deferred: list[tuple[int, ndarray, str]]) -> None:
+        """Fill in the digit images left for batching, with one preprocess_batch per profile and region size"""
+        groups = {}
+        for index, roi, profile in deferred:
+            groups.setdefault((profile, roi.shape), []).append((index, roi))
+
+        for (profile, _), items in groups.items():
+            images = self.scoreboard_finder.preprocess_batch([roi for _, roi in items], profile=profile)
+            for (index, _), image in zip(items, images):
+                digits[index] = image
+
+    def _score_pending(self, pending: list[tuple[float, list[list], list[int]]], digits: list[ndarray],
+                       reads: list[list]):
+        for read, digit_read in zip(reads, self.get_scores_batch(digits)):
+            read[0] = digit_read
+
+        for timestamp, sample_reads, roi_hashes in pending:
+            scores, confidences = [read[0][0] for read in sample_reads], [read[0][1] for read in sample_reads]
+            if self.read_store is not None:
+                self.read_store.add_sample(timestamp, scores, confidences, roi_hashes)
+
+            yield timestamp, scores, confidences
+
+    def validate_score(self, score: int, confidence: float = None) -> bool:
+        return self.score_validator.validate_score(score, confidence)
+
+    def validate_scores(self, home_score: int, away_score: int, home_confidence: float = None,
+                        away_confidence: float = None) -> tuple[bool, bool]:
+        """Validate both teams' reads of one frame, returns Tuple(home goal, away goal)"""
+        return self.team_score_validator.validate_scores(home_score, away_score, home_confidence, away_confidence)
+
+    def reset_score_validation(self) -> None:
+        """Start a new game: scores from 0 and no reads reused from the previous game's regions"""
+        self.team_score_validator.reset()
+        if self.roi_gate is not None:
+            self.roi_gate.reset()
 
     def clip_goal(self, source_video: str, clip_name: str, start: int, duration: int) -> bool:
         return self.video_loader.clip_video(source_video, clip_name, start, duration)
 
+    def clip_goals(self, source_video: str, clips: list[tuple[str, float, float]]) -> bool:
+        """Cut all of a recording's goal clips, Tuple(clip name, start, duration), in one ffmpeg run"""
+        return self.video_loader.clip_videos(source_video, clips)
+
+    def build_reel(self, clips: list[tuple[str, float, float]], reel_name: str) -> bool:
+        """Join a game's goal clips, Tuple(clip name, start, duration), into one reel in start order"""
+        clip_names = [clip_name for clip_name, _, _ in sorted(clips, key=lambda clip: clip[1])]
+        return self.reel_builder.build(clip_names, reel_name)
+
     def delete_video(self, file_name: str) -> bool:
         return self.video_loader.delete_video(file_name)
\ No newline at end of file
@@ -0,0 +1,82 @@
+# tools/bench_preprocess_batch.py
+"""
+Check ScoreboardFinder.preprocess_batch against the per-patch chain and time both.
+
+Run from the repository root:
+    python -m tools.bench_preprocess_batch <recording in data/recordings> [field] [home|away]
+"""
+
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from config import FIELD_CONFIGS
+from video import VideoLoader, ScoreboardFinder
+
+BATCH_SIZES = (1, 32, 256)
+
+# OpenCV's INTER_AREA accumulates in float32, so exact ties may round one level apart
+MAX_PIXEL_DIFF = 1
+MAX_MISMATCH_RATIO = 0.02
+
+
+def per_patch(regions):
+    """The chain as ScoreboardReader sees it today: preprocess_region, then its 28x28 resize"""
+    return np.stack([cv2.resize(ScoreboardFinder.preprocess_region(region), (28, 28),
+                                interpolation=cv2.INTER_AREA) for region in regions])
+
+
+def collect_regions(file_name, field_name, team, count):
+    field = FIELD_CONFIGS[field_name]
+    region_config = field[f"{team}_score_region"]
+
+    finder = ScoreboardFinder()
+    regions = []
+    for _, frame in VideoLoader().frames_generator(file_name, sample_rate=1):
+        regions.append(finder.extract_region(frame, region_config, field['rotation_angle']))
+        if len(regions) == count:
+            break
+
+    return np.stack(regions)
+
+
+def timed(function, regions, repeats=3):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function(regions)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(file_name, field_name="East Field", team="home"):
+    regions = collect_regions(file_name, field_name, team, max(BATCH_SIZES))
+    if len(regions) == 0:
+        print(f"No frames read from {file_name}")
+        return False
+
+    expected = per_patch(regions).astype(int)
+    actual = ScoreboardFinder.preprocess_batch(regions).astype(int)
+    diff = np.abs(expected - actual)
+    mismatch_ratio = float(np.mean(diff > 0))
+
+    print(f"Checked {len(regions)} patches of {file_name} ({field_name}, {team})")
+    print(f"Max pixel diff: {diff.max()} (limit {MAX_PIXEL_DIFF})")
+    print(f"Mismatching pixels: {mismatch_ratio:.2%} (limit {MAX_MISMATCH_RATIO:.0%})")
+
+    for batch_size in BATCH_SIZES:
+        batch = regions[:batch_size]
+        loop_time = timed(per_patch, batch)
+        batch_time = timed(ScoreboardFinder.preprocess_batch, batch)
+        print(f"batch {len(batch):>4}: per patch {loop_time * 1000 / len(batch):.2f} ms, "
+              f"batched {batch_time * 1000 / len(batch):.2f} ms ({loop_time / batch_time:.1f}x)")
+
+    return diff.max() <= MAX_PIXEL_DIFF and mismatch_ratio <= MAX_MISMATCH_RATIO
+
+
+if __name__ == "__main__":
+    passed = run(sys.argv[1], *sys.argv[2:4])
+    print("PASS" if passed else "FAIL")
+    sys.exit(0 if passed else 1)
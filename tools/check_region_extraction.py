@@ -0,0 +1,60 @@
+# tools/check_region_extraction.py
+"""
+Regression check: ROI-only warp extraction vs rotating the whole frame with PIL
+"""
+
+import sys
+
+import cv2
+import numpy as np
+
+from config import FIELD_CONFIGS
+from video.scoreboard_finder import ScoreboardFinder
+
+# Bicubic kernels differ slightly between PIL and OpenCV
+MAX_PIXEL_DIFF = 8
+MAX_MEAN_DIFF = 1.5
+
+
+def check_recording(video_path, field_name, num_frames=50, frame_step=300):
+    """Compare both extraction paths on frames of a recording"""
+    field = FIELD_CONFIGS[field_name]
+    rotation = field['rotation_angle']
+    regions = [field['home_score_region'], field['away_score_region']]
+
+    finder = ScoreboardFinder()
+    cap = cv2.VideoCapture(video_path)
+
+    worst_max, worst_mean, checked = 0, 0.0, 0
+    frame_num = 0
+
+    while checked < num_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+
+        if frame_num % frame_step == 0:
+            for region in regions:
+                expected = finder.extract_region_full_rotation(frame, region, rotation).astype(int)
+                actual = finder.extract_region(frame, region, rotation).astype(int)
+
+                diff = np.abs(expected - actual)
+                worst_max = max(worst_max, int(diff.max()))
+                worst_mean = max(worst_mean, float(diff.mean()))
+            checked += 1
+
+        frame_num += 1
+
+    cap.release()
+
+    print(f"Checked {checked} frames of {video_path} ({field_name})")
+    print(f"Worst max pixel diff: {worst_max} (limit {MAX_PIXEL_DIFF})")
+    print(f"Worst mean pixel diff: {worst_mean:.3f} (limit {MAX_MEAN_DIFF})")
+
+    return checked > 0 and worst_max <= MAX_PIXEL_DIFF and worst_mean <= MAX_MEAN_DIFF
+
+
+if __name__ == "__main__":
+    passed = check_recording(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else "East Field")
+    print("PASS" if passed else "FAIL")
+    sys.exit(0 if passed else 1)
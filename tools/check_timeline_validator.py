@@ -0,0 +1,63 @@
+# tools/check_timeline_validator.py
+"""
+Check ScoreValidator.validate_timeline against the streaming validate_score on random timelines.
+
+Run from the repository root:
+    python -m tools.check_timeline_validator [timelines]
+"""
+
+import sys
+
+import numpy as np
+
+from video.score_validator import ScoreValidator
+
+
+def random_timeline(rng, length):
+    """Scores that mostly climb, with misreads of a few goals either way"""
+    scores = np.cumsum(rng.random(length) < 0.1)
+    misreads = (rng.random(length) < 0.15) * rng.integers(-3, 4, length)
+    return np.arange(length, dtype=float), np.clip(scores + misreads, 0, 9)
+
+
+def random_confidences(rng, length):
+    """Mostly confident reads, with some in between and some unsure"""
+    return rng.choice([0.999, 0.95, 0.5], size=length, p=[0.7, 0.2, 0.1])
+
+
+def streaming_events(validator, timestamps, scores, confidences):
+    reads = zip(timestamps, scores, confidences if confidences is not None else [None] * len(scores))
+    return [(timestamp, score) for timestamp, score, confidence in reads
+            if validator.validate_score(int(score), confidence)]
+
+
+def check(timelines=2000, seed=0):
+    rng = np.random.default_rng(seed)
+
+    for _ in range(timelines):
+        length = int(rng.integers(0, 200))
+        timestamps, scores = random_timeline(rng, length)
+        confidences = random_confidences(rng, length) if rng.random() < 0.5 else None
+        stable = sorted(int(count) for count in rng.integers(1, 7, 3))
+
+        def validator():
+            return ScoreValidator(required_stable=stable[1], confident_stable=stable[0], unsure_stable=stable[2])
+
+        expected = streaming_events(validator(), timestamps, scores, confidences)
+        actual = list(zip(*validator().validate_timeline(timestamps, scores, confidences)))
+
+        if expected != actual:
+            print(f"Mismatch for stable counts {stable}: {scores.tolist()}")
+            print(f"confidences: {None if confidences is None else confidences.tolist()}")
+            print(f"streaming: {expected}")
+            print(f"timeline:  {actual}")
+            return False
+
+    print(f"{timelines} random timelines give identical events")
+    return True
+
+
+if __name__ == "__main__":
+    passed = check(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
+    print("PASS" if passed else "FAIL")
+    sys.exit(0 if passed else 1)
@@ -0,0 +1,53 @@
+# tools/compare_adaptive_scan.py
+"""
+Verify that the adaptive coarse-to-fine scan finds the same goals as a full scan.
+
+Run from the repository root:
+    python -m tools.compare_adaptive_scan <recording in data/recordings> [field] [home|away]
+"""
+
+import sys
+
+from config import FIELD_CONFIGS
+from video import VideoLoader, ScoreboardFinder, ScoreboardReader, ScoreValidator, AdaptiveScanner
+
+
+def goal_events(scores):
+    """Feed (timestamp, score, confidence) reads through a fresh ScoreValidator"""
+    validator = ScoreValidator()
+    return [(timestamp, score) for timestamp, score, confidence in scores
+            if validator.validate_score(score, confidence)]
+
+
+def compare_scans(file_name, field_name="East Field", team="home", sample_rate=1):
+    field = FIELD_CONFIGS[field_name]
+    region = field[f"{team}_score_region"]
+    rotation = field['rotation_angle']
+
+    finder = ScoreboardFinder()
+    reader = ScoreboardReader()
+
+    full_loader = VideoLoader()
+    full_reads = []
+    for timestamp, frame in full_loader.frames_generator(file_name, sample_rate):
+        digit = finder.preprocess_scoreboard_region(frame, region, rotation)
+        full_reads.append((timestamp, *reader.get_score(digit)))
+
+    scanner = AdaptiveScanner(VideoLoader(), finder, reader)
+    adaptive_reads = [(timestamp, scores[0], confidences[0]) for timestamp, scores, confidences
+                      in scanner.stream_scores(file_name, [region], rotation, sample_rate)]
+
+    full_events = goal_events(full_reads)
+    adaptive_events = goal_events(adaptive_reads)
+
+    print(f"Full scan:     {len(full_reads)} samples decoded, goals {full_events}")
+    print(f"Adaptive scan: {scanner.samples_read} samples decoded, goals {adaptive_events}")
+
+    return full_events == adaptive_events
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    matched = compare_scans(*args)
+    print("PASS" if matched else "FAIL")
+    sys.exit(0 if matched else 1)
@@ -0,0 +1,79 @@
+# tools/import_budget.py
+"""
+Cold-start import budget for the lightweight packages.
+
+Runs `python -X importtime -c "import <package>"` in a fresh interpreter and
+fails if the package takes longer than its budget or drags in a heavy
+dependency. Run from the repository root: python -m tools.import_budget
+"""
+
+import subprocess
+import sys
+
+# Cumulative import time budgets in milliseconds
+BUDGETS_MS = {
+    "video": 50,
+    "scrapers": 50,
+    "config": 50,
+}
+
+HEAVY_MODULES = ["tensorflow", "keras", "cv2", "PIL", "selenium"]
+
+
+def measure_import(package):
+    """
+    Import a package in a fresh interpreter
+
+    Returns:
+        (cumulative import time in ms, list of imported top-level module names)
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {package}"],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+
+    if result.returncode != 0:
+        raise RuntimeError(f"import {package} failed:\n{result.stderr}")
+
+    cumulative_us = 0
+    imported = set()
+
+    # Lines look like: "import time:       123 |       4567 | package.module"
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+
+        _, cumulative, name = [part.strip() for part in line.split(":", 1)[1].split("|")]
+        if not cumulative.isdigit():
+            continue
+
+        imported.add(name.split(".")[0])
+        if name == package:
+            cumulative_us = int(cumulative)
+
+    return cumulative_us / 1000, sorted(imported)
+
+
+def check_budgets(budgets=None):
+    """Check every package against its budget, returns True if all pass"""
+    budgets = budgets or BUDGETS_MS
+    passed = True
+
+    for package, budget_ms in budgets.items():
+        elapsed_ms, imported = measure_import(package)
+        heavy = [module for module in HEAVY_MODULES if module in imported]
+        ok = elapsed_ms <= budget_ms and not heavy
+
+        print(f"{'OK  ' if ok else 'FAIL'} import {package}: {elapsed_ms:.1f} ms (budget {budget_ms} ms)")
+        if heavy:
+            print(f"     pulled in heavy modules: {', '.join(heavy)}")
+
+        passed = passed and ok
+
+    return passed
+
+
+if __name__ == "__main__":
+    sys.exit(0 if check_budgets() else 1)
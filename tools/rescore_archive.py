@@ -0,0 +1,64 @@
+# tools/rescore_archive.py
+"""
+Re-score a game from its ROI archive with the current preprocessing and digit model.
+
+Reads the memory-mapped score regions written by VideoLoader, runs them through
+ScoreboardFinder and ScoreboardReader, and compares the result with the reads
+stored for the game when it was first analyzed.
+
+Run from the repository root:
+    python -m tools.rescore_archive <game> [full|fast|minimal]
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from video.read_store import ReadStore
+from video.roi_archive import RoiArchive
+from video.score_validator import ScoreValidator
+from video.scoreboard_finder import ScoreboardFinder
+from video.scoreboard_reader import ScoreboardReader
+
+REGION_NAMES = ("home", "away")
+
+
+def rescore(game_id, profile=None):
+    archive = RoiArchive(game_id)
+    if not archive.exists():
+        print(f"No ROI archive for {game_id} in {RoiArchive.ROOT}")
+        return False
+
+    timestamps, stacks, region_configs = archive.load()
+    reader = ScoreboardReader()
+    validator = ScoreValidator()
+    read_store = ReadStore()
+
+    try:
+        for region, (stack, region_config) in enumerate(zip(stacks, region_configs)):
+            region_profile = profile or ScoreboardFinder.preprocess_profile(region_config)
+
+            start = time.perf_counter()
+            digit_images = [ScoreboardFinder.preprocess_region(roi, region_profile) for roi in stack]
+            digits, confidences = reader.predict_batch(digit_images)
+            elapsed = time.perf_counter() - start
+
+            name = REGION_NAMES[region] if region < len(REGION_NAMES) else f"region {region}"
+            print(f"{name}: {len(digits)} samples re-scored with '{region_profile}' in {elapsed:.1f}s")
+
+            _, stored_digits, _ = read_store.load_timeline(game_id, region)
+            if len(stored_digits) == len(digits):
+                print(f"  agrees with stored reads on {np.mean(stored_digits == digits) * 100:.2f}% of samples")
+
+            goal_times, goal_scores = validator.validate_timeline(timestamps, digits, confidences)
+            print(f"  goals: {[(int(score), round(float(t), 1)) for t, score in zip(goal_times, goal_scores)]}")
+    finally:
+        read_store.close()
+
+    return True
+
+
+if __name__ == "__main__":
+    found = rescore(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else None)
+    sys.exit(0 if found else 1)
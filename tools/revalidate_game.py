@@ -0,0 +1,50 @@
+# tools/revalidate_game.py
+"""
+Re-run score validation on the reads stored for a game, without the recording.
+
+Run from the repository root:
+    python -m tools.revalidate_game                      (list stored games)
+    python -m tools.revalidate_game <game> [required_stable] [confident_stable] [unsure_stable]
+"""
+
+import sys
+import time
+
+from video.read_store import ReadStore
+from video.score_validator import ScoreValidator
+
+REGION_NAMES = ("home", "away")
+
+# Seconds of video kept before a confirmed goal, as in main.py
+CLIP_LEAD = 30
+
+
+def revalidate(store, game_id, *stable_counts):
+    validator = ScoreValidator(*stable_counts)
+    start = time.perf_counter()
+
+    for region, name in enumerate(REGION_NAMES):
+        timestamps, digits, confidences = store.load_timeline(game_id, region)
+        if len(timestamps) == 0:
+            continue
+
+        goal_times, goal_scores = validator.validate_timeline(timestamps, digits, confidences)
+
+        print(f"{name}: {len(timestamps)} reads, {len(goal_scores)} goals")
+        for goal_time, score in zip(goal_times, goal_scores):
+            print(f"  {score} at {goal_time:.1f}s, clip from {max(goal_time - CLIP_LEAD, 0):.1f}s")
+
+    print(f"Validated in {(time.perf_counter() - start) * 1000:.1f} ms "
+          f"(required {validator.required_stable}, confident {validator.confident_stable}, "
+          f"unsure {validator.unsure_stable})")
+
+
+if __name__ == "__main__":
+    read_store = ReadStore()
+    try:
+        if len(sys.argv) < 2:
+            print("\n".join(read_store.games()) or "No games stored")
+        else:
+            revalidate(read_store, sys.argv[1], *(int(count) for count in sys.argv[2:5]))
+    finally:
+        read_store.close()
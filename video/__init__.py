@@ -1,13 +1,52 @@
-from .video_loader import VideoLoader
-from .scoreboard_finder import ScoreboardFinder
-from .scoreboard_reader import ScoreboardReader
-from .screen_recorder import ScreenRecorder
-from .score_validator import ScoreValidator
+"""
+Video recording and scoreboard analysis
+
+Classes are imported on first access so that `import video` does not load
+OpenCV, PIL or the digit model runtime until they are actually used.
+"""
+import importlib
+
+_MODULES = {
+    'VideoLoader': '.video_loader',
+    'ScoreboardFinder': '.scoreboard_finder',
+    'ScoreboardReader': '.scoreboard_reader',
+    'ScreenRecorder': '.screen_recorder',
+    'CaptureBackend': '.capture_backend',
+    'ScoreValidator': '.score_validator',
+    'TeamScoreValidator': '.team_score_validator',
+    'RoiChangeGate': '.roi_gate',
+    'AdaptiveScanner': '.adaptive_scanner',
+    'ShardedAnalyzer': '.sharded_analyzer',
+    'SharedFrameRing': '.frame_ring',
+    'ReadStore': '.read_store',
+    'RoiArchive': '.roi_archive',
+    'GameCheckpoint': '.game_checkpoint',
+    'ReelBuilder': '.reel_builder',
+}
 
 __all__ = [
     'VideoLoader',
     'ScoreboardFinder',
     'ScoreboardReader',
     'ScreenRecorder',
+    'CaptureBackend',
     'ScoreValidator',
-]
\ No newline at end of file
+    'TeamScoreValidator',
+    'RoiChangeGate',
+    'AdaptiveScanner',
+    'ShardedAnalyzer',
+    'SharedFrameRing',
+    'ReadStore',
+    'RoiArchive',
+    'GameCheckpoint',
+    'ReelBuilder',
+]
+
+
+def __getattr__(name):
+    if name not in _MODULES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(_MODULES[name], __name__), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,118 @@
+import logging
+
+from config import ADAPTIVE_COARSE_RATE
+
+logger = logging.getLogger(__name__)
+
+
+class AdaptiveScanner:
+    """
+    Coarse-to-fine score scan that only decodes samples around score changes
+
+    The recording is first read every `coarse_rate` seconds. Where two consecutive
+    coarse reads differ, the interval is bisected down to single samples to find
+    where the score changed. Every other sample is assumed to hold the read on
+    either side of it, so the full per-sample timeline (and therefore the
+    ScoreValidator events) matches a dense scan, as long as the scoreboard does not
+    change and change back between two coarse reads.
+    """
+
+    def __init__(self, video_loader, scoreboard_finder, scoreboard_reader,
+                 coarse_rate: int = ADAPTIVE_COARSE_RATE):
+        self.video_loader = video_loader
+        self.scoreboard_finder = scoreboard_finder
+        self.scoreboard_reader = scoreboard_reader
+        self.coarse_rate = coarse_rate
+        self.samples_read = 0
+
+    def stream_scores(self, file_name: str, region_configs: list[dict], rotation_angle: int,
+                      sample_rate: int = 1):
+        """
+        Reconstruct the score timeline of a recording at `sample_rate` resolution
+
+        :param file_name: Recording in the recordings folder
+        :param region_configs: Score regions to read (e.g. home and away)
+        :param rotation_angle: Degrees the regions are rotated by (neg = clockwise)
+        :param sample_rate: Seconds between samples of the reconstructed timeline
+        :return: Generator of Tuple(timestamp, scores per region, confidences per region), same samples as a
+                 dense scan. Samples that were not decoded repeat the confidences of the read they copy.
+        """
+        self.video_loader.open_seekable(file_name)
+        self.samples_read = 0
+
+        try:
+            fps = self.video_loader.fps
+            frame_interval = max(int(fps * sample_rate), 1)
+            sample_count = (self.video_loader.frame_count - 1) // frame_interval + 1
+            if sample_count <= 0:
+                logger.warning(f"{file_name} reports no frames, nothing to scan")
+                return
+
+            step = max(round(self.coarse_rate / sample_rate), 1)
+
+            reads = {}
+
+            def read(sample):
+                if sample not in reads:
+                    reads[sample] = self._read_sample(sample * frame_interval, region_configs, rotation_angle)
+                return reads[sample]
+
+            coarse = list(range(0, sample_count, step))
+            if coarse[-1] != sample_count - 1:
+                coarse.append(sample_count - 1)
+
+            if read(0) is None:
+                return
+            yield 0.0, *self._copy(read(0))
+
+            for start, end in zip(coarse, coarse[1:]):
+                value = read(start)
+                read(end)
+                self._bisect(read, start, end)
+
+                for sample in range(start + 1, end + 1):
+                    value = reads.get(sample, value)
+                    if value is None:
+                        return
+
+                    yield sample * frame_interval / fps, *self._copy(value)
+
+        finally:
+            self.video_loader.close_seekable()
+            logger.info(f"Adaptive scan decoded {self.samples_read} samples")
+
+    @staticmethod
+    def _bisect(read, start: int, end: int):
+        """Read samples between start and end until every differing neighbour pair is adjacent"""
+        def scores(sample):
+            value = read(sample)
+            return None if value is None else value[0]
+
+        intervals = [(start, end)]
+
+        while intervals:
+            low, high = intervals.pop()
+            if high - low <= 1 or scores(low) == scores(high):
+                continue
+
+            mid = (low + high) // 2
+            read(mid)
+            intervals.append((mid, high))
+            intervals.append((low, mid))
+
+    def _read_sample(self, frame_num: int, region_configs: list[dict], rotation_angle: int):
+        frame = self.video_loader.read_frame_at(frame_num)
+        if frame is None:
+            return None
+
+        self.samples_read += 1
+
+        digits = [self.scoreboard_finder.preprocess_scoreboard_region(frame, region, rotation_angle)
+                  for region in region_configs]
+        digit_reads = self.scoreboard_reader.get_scores_batch(digits)
+        return tuple(digit for digit, _ in digit_reads), tuple(confidence for _, confidence in digit_reads)
+
+    @staticmethod
+    def _copy(value):
+        scores, confidences = value
+        return list(scores), list(confidences)
@@ -0,0 +1,151 @@
+"""
+Vectorized image operations over stacks of small patches, shape (N, H, W[, C])
+
+Each function reproduces the single-image OpenCV/PIL call used by
+ScoreboardFinder.preprocess_region, so a whole batch goes through one NumPy
+operation, or one OpenCV call on the patches tiled into a single image,
+instead of one library call per patch.
+"""
+from functools import lru_cache
+
+import cv2
+import numpy as np
+
+# PIL's fixed-point resampling precision for 8-bit images
+_PIL_PRECISION_BITS = 32 - 8 - 2
+
+
+def _lanczos(x):
+    return np.where((x >= -3.0) & (x < 3.0), np.sinc(x) * np.sinc(x / 3), 0.0)
+
+
+@lru_cache(maxsize=None)
+def _pil_lanczos_coefficients(in_size: int, out_size: int) -> np.ndarray:
+    """Fixed-point coefficient matrix (out_size, in_size) matching PIL's LANCZOS resize"""
+    scale = in_size / out_size
+    filter_scale = max(scale, 1.0)
+    support = 3.0 * filter_scale
+
+    coefficients = np.zeros((out_size, in_size))
+    for out_x in range(out_size):
+        center = (out_x + 0.5) * scale
+        x_min = max(int(center - support + 0.5), 0)
+        x_max = min(int(center + support + 0.5), in_size)
+
+        weights = _lanczos((np.arange(x_min, x_max) - center + 0.5) / filter_scale)
+        if weights.sum() != 0.0:
+            weights = weights / weights.sum()
+        coefficients[out_x, x_min:x_max] = weights
+
+    scaled = coefficients * (1 << _PIL_PRECISION_BITS)
+    return np.where(scaled < 0, scaled - 0.5, scaled + 0.5).astype(np.int64)
+
+
+def _pil_round(acc):
+    """PIL's fixed-point rounding and clamp back to 8-bit, kept in float64 (exact for these sums)"""
+    acc = np.floor((acc + (1 << (_PIL_PRECISION_BITS - 1))) / (1 << _PIL_PRECISION_BITS))
+    return np.clip(acc, 0, 255)
+
+
+def resize_lanczos(stack, out_width: int, out_height: int):
+    """PIL Image.resize(LANCZOS) over (N, H, W, C): horizontal pass, then vertical"""
+    count, in_height, in_width, channels = stack.shape
+    horizontal_coefficients = _pil_lanczos_coefficients(in_width, out_width).T.astype(np.float64)
+    vertical_coefficients = _pil_lanczos_coefficients(in_height, out_height).astype(np.float64)
+
+    # (N, H, C, W) @ (W, W') -> (N, H, C, W')
+    horizontal = _pil_round(stack.transpose(0, 1, 3, 2).astype(np.float64) @ horizontal_coefficients)
+    # (H', H) @ (N, H, C * W') -> (N, H', C * W')
+    vertical = _pil_round(vertical_coefficients @ horizontal.reshape(count, in_height, -1))
+
+    return vertical.reshape(count, out_height, channels, out_width).transpose(0, 1, 3, 2).astype(np.uint8)
+
+
+@lru_cache(maxsize=None)
+def _area_weights(in_size: int, out_size: int) -> np.ndarray:
+    """Weight matrix (out_size, in_size) of cv2.INTER_AREA along one axis"""
+    scale = in_size / out_size
+    weights = np.zeros((out_size, in_size))
+
+    for out_x in range(out_size):
+        start, end = out_x * scale, (out_x + 1) * scale
+        for in_x in range(int(np.floor(start)), min(int(np.ceil(end)), in_size)):
+            weights[out_x, in_x] = (min(end, in_x + 1) - max(start, in_x)) / scale
+
+    return weights
+
+
+def resize_area(stack, out_width: int, out_height: int):
+    """cv2.resize(INTER_AREA) down to (out_height, out_width) over (N, H, W)"""
+    _, in_height, in_width = stack.shape
+
+    resized = _area_weights(in_height, out_height) @ stack.astype(np.float64) @ _area_weights(in_width, out_width).T
+    # OpenCV accumulates in float32, so the odd exact .5 tie can land one grey level apart
+    return np.clip(np.rint(resized), 0, 255).astype(np.uint8)
+
+
+def _tiled(stack, before: int, after: int, operation, **pad_args):
+    """
+    Run a single-image OpenCV call once over the whole stack
+
+    Every patch gets its own border first, then the padded patches are stacked
+    into one tall image. Only pixels within the border of a patch are read when
+    computing its interior, so the cropped result matches a per-patch call.
+    """
+    padded = np.pad(stack, ((0, 0), (before, after), (before, after)), **pad_args)
+    count, height, width = padded.shape
+
+    result = operation(padded.reshape(count * height, width)).reshape(count, height, width)
+    return result[:, before:height - after, before:width - after]
+
+
+def sharpen(stack):
+    """cv2.filter2D with the [[-1,-1,-1],[-1,9,-1],[-1,-1,-1]] kernel over (N, H, W)"""
+    kernel = np.array([[-1, -1, -1], [-1, 9, -1], [-1, -1, -1]])
+    return _tiled(stack, 1, 1, lambda image: cv2.filter2D(image, -1, kernel), mode='reflect')
+
+
+def otsu_threshold(stack):
+    """cv2.threshold(THRESH_BINARY + THRESH_OTSU) computed independently for each patch of (N, H, W)"""
+    count = stack.shape[0]
+    pixels = stack.reshape(count, -1)
+
+    offsets = (np.arange(count) * 256)[:, None]
+    histogram = np.bincount((pixels + offsets).ravel(), minlength=count * 256).reshape(count, 256)
+    p = histogram / pixels.shape[1]
+
+    levels = np.arange(256)
+    q1 = np.cumsum(p, axis=1)
+    q2 = 1.0 - q1
+    mu = np.sum(levels * p, axis=1, keepdims=True)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mu1 = np.cumsum(levels * p, axis=1) / q1
+        mu2 = (mu - q1 * mu1) / q2
+        sigma = q1 * q2 * (mu1 - mu2) ** 2
+
+    eps = np.finfo(np.float32).eps
+    sigma[(np.minimum(q1, q2) < eps) | (np.maximum(q1, q2) > 1.0 - eps)] = -1.0
+
+    thresholds = np.argmax(sigma, axis=1)
+    thresholds[sigma.max(axis=1) <= 0] = 0
+
+    return np.where(stack > thresholds[:, None, None], 255, 0).astype(np.uint8)
+
+
+def _morph(stack, size: int, iterations: int, operation, neutral: int):
+    """Erode/dilate with a size x size rectangle, anchored like OpenCV (anchor at size // 2)"""
+    kernel = np.ones((size, size), np.uint8)
+    before, after = size // 2, size - 1 - size // 2
+
+    for _ in range(iterations):
+        stack = _tiled(stack, before, after, lambda image: operation(image, kernel), constant_values=neutral)
+    return stack
+
+
+def erode(stack, size: int, iterations: int = 1):
+    return _morph(stack, size, iterations, cv2.erode, 255)
+
+
+def dilate(stack, size: int, iterations: int = 1):
+    return _morph(stack, size, iterations, cv2.dilate, 0)
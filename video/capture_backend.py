@@ -0,0 +1,113 @@
+import logging
+import subprocess
+import sys
+
+from config import RECORDING_FPS, VIDEO_SIZE, CAPTURE_BACKEND, CAPTURE_DISPLAY, CAPTURE_REGION, REPLAY_FILE
+
+logger = logging.getLogger(__name__)
+
+
+class CaptureBackend:
+    """
+    The ffmpeg input ScreenRecorder records from
+
+    "avfoundation" grabs the macOS screen, "x11grab" a Linux X display and
+    "replay" plays an existing recording back at real-time pace, to run the
+    live pipeline without a stream. x11grab can grab just a region of the
+    screen (e.g. the player), which cuts encode CPU and file size. Score
+    regions in FIELD_CONFIGS are measured on the captured frame, so they have
+    to be measured again when the capture region changes.
+    """
+
+    BACKENDS = ("avfoundation", "x11grab", "replay")
+
+    # avfoundation device index of the screen
+    SCREEN_DEVICE = '1'
+
+    def __init__(self, name: str = CAPTURE_BACKEND, region: list[int] = CAPTURE_REGION,
+                 display: str = CAPTURE_DISPLAY, replay_file: str = REPLAY_FILE):
+        self.name = name or self.default_backend()
+        if self.name not in self.BACKENDS:
+            raise ValueError(f"Unknown capture backend {self.name!r}, expected one of {self.BACKENDS}")
+
+        if self.name == "replay" and replay_file is None:
+            raise ValueError("The replay capture backend needs a REPLAY_FILE")
+
+        if region is not None and self.name != "x11grab":
+            logger.warning(f"The {self.name} capture backend ignores CAPTURE_REGION")
+            region = None
+
+        self.region = region
+        self.display = display
+        self.replay_file = replay_file
+
+    @staticmethod
+    def default_backend() -> str:
+        return "avfoundation" if sys.platform == "darwin" else "x11grab"
+
+    @property
+    def frame_size(self) -> str:
+        """Requested size of the captured frames as WIDTHxHEIGHT, or None for a replay (the file's own size)"""
+        if self.name == "replay":
+            return None
+
+        if self.region is not None:
+            _, _, width, height = self.region
+            return f"{width}x{height}"
+
+        return VIDEO_SIZE
+
+    def frame_dimensions(self) -> tuple[int, int]:
+        """
+        Tuple(width, height) of the frames the input actually delivers
+
+        Probed from the input itself, since a device may not honour the
+        requested size (avfoundation captures a Retina screen at its native
+        resolution, whatever -video_size says).
+        """
+        cmd = [
+            "ffprobe",
+            "-v", "error",
+            *self._open_args(),
+            "-select_streams", "v:0",
+            "-show_entries", "stream=width,height",
+            "-of", "csv=p=0",
+        ]
+
+        result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, timeout=30)
+        if result.returncode != 0 or not result.stdout.strip():
+            raise RuntimeError(f"Could not probe the {self.name} capture input:\n{result.stderr}")
+
+        width, height = result.stdout.strip().splitlines()[0].split(',')[:2]
+        return int(width), int(height)
+
+    def _open_args(self) -> list:
+        """ffmpeg input options that open the capture input, ending with its -i"""
+        if self.name == "avfoundation":
+            return [
+                '-f', 'avfoundation',
+                '-framerate', str(RECORDING_FPS),
+                '-video_size', self.frame_size,
+                '-i', self.SCREEN_DEVICE,
+            ]
+
+        if self.name == "x11grab":
+            x, y = self.region[:2] if self.region is not None else (0, 0)
+            return [
+                '-f', 'x11grab',
+                '-framerate', str(RECORDING_FPS),
+                '-video_size', self.frame_size,
+                '-draw_mouse', '0',
+                '-i', f'{self.display}+{x},{y}',
+            ]
+
+        return ['-i', str(self.replay_file)]
+
+    def input_args(self, duration) -> list:
+        """ffmpeg input options that capture `duration` seconds"""
+        open_args = self._open_args()
+
+        # Read a replay at the file's frame rate, like a live source
+        pace_args = ['-re'] if self.name == "replay" else []
+
+        return [*pace_args, *open_args[:-2], '-t', str(duration), *open_args[-2:]]
@@ -0,0 +1,78 @@
+"""
+ffmpeg settings and helpers shared by recording, clipping and reel building
+
+Everything that writes H.264 uses `encoder_args`, so re-encoded clip heads
+and reels can be joined to stream-copied parts of a recording.
+"""
+import logging
+import subprocess
+
+logger = logging.getLogger(__name__)
+
+# framecrc header lines that must match for two H.264 files to be joined by stream copy
+_CONCAT_HEADER_FIELDS = ("#extradata", "#codec_id", "#dimensions", "#sar")
+
+
+def encoder_args() -> list:
+    """H.264 output options of recordings, clips and reels"""
+    return [
+        '-c:v', 'libx264',
+        '-preset', 'veryfast',   # "slow" wastes CPU with no gain for screen content
+        '-crf', '18',            # visually lossless
+        '-pix_fmt', 'yuv420p',
+        '-profile:v', 'high',
+        '-level', '4.2',
+    ]
+
+
+def run_ffmpeg(cmd: list, description: str) -> bool:
+    """
+    Run an ffmpeg command, logging its stderr if it fails
+
+    :param cmd: Full command, starting with "ffmpeg"
+    :param description: What the command does, for the error log (e.g. "reel")
+    :return: True if ffmpeg succeeded
+    """
+    result = subprocess.run(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+
+    if result.returncode != 0:
+        logger.error(f"FFmpeg {description} failed:\n{result.stderr.decode()}")
+        return False
+
+    return True
+
+
+def video_stream_header(file_path) -> list[str]:
+    """
+    Codec header of the first video stream: its SPS/PPS extradata checksum, codec, size and aspect
+
+    Read from ffmpeg's framecrc output of one stream-copied packet, so nothing is decoded.
+
+    :param file_path: Video file
+    :return: Header lines, empty if the file could not be read
+    """
+    result = subprocess.run(
+        [
+            "ffmpeg",
+            "-v", "error",
+            "-i", str(file_path),
+            "-map", "0:v:0",
+            "-c", "copy",
+            "-frames:v", "1",
+            "-f", "framecrc",
+            "-",
+        ],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+
+    if result.returncode != 0:
+        logger.error(f"FFmpeg header probe of {file_path} failed:\n{result.stderr}")
+        return []
+
+    return [line for line in result.stdout.splitlines() if line.startswith(_CONCAT_HEADER_FIELDS)]
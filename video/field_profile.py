@@ -0,0 +1,116 @@
+import math
+
+import cv2
+import numpy as np
+
+
+class FieldProfile:
+    """
+    Scoreboard geometry for a field at a given frame size.
+
+    Region configs in FIELD_CONFIGS are measured on the frame after it has been
+    rotated by `rotation_angle` with PIL's ``rotate(expand=True)``. The profile
+    maps those coordinates back into the recorded (unrotated) frame.
+    """
+
+    BICUBIC_SUPPORT = 2
+
+    def __init__(self, rotation_angle: int, frame_width: int, frame_height: int):
+        self.rotation_angle = rotation_angle
+        self.frame_width = frame_width
+        self.frame_height = frame_height
+        self.matrix = self._build_inverse_matrix()
+        self._region_warps = {}
+
+    def _build_inverse_matrix(self):
+        """Mirror PIL's rotate(expand=True) matrix (rotated -> source coordinates)"""
+        w, h = self.frame_width, self.frame_height
+        cx, cy = w / 2, h / 2
+
+        angle = -math.radians(self.rotation_angle)
+        a, b = round(math.cos(angle), 15), round(math.sin(angle), 15)
+        d, e = round(-math.sin(angle), 15), round(math.cos(angle), 15)
+
+        c = a * -cx + b * -cy + cx
+        f = d * -cx + e * -cy + cy
+
+        corners = [(a * x + b * y + c, d * x + e * y + f) for x, y in ((0, 0), (w, 0), (w, h), (0, h))]
+        nw = math.ceil(max(x for x, _ in corners)) - math.floor(min(x for x, _ in corners))
+        nh = math.ceil(max(y for _, y in corners)) - math.floor(min(y for _, y in corners))
+
+        tx, ty = -(nw - w) / 2.0, -(nh - h) / 2.0
+        c, f = a * tx + b * ty + c, d * tx + e * ty + f
+
+        return a, b, c, d, e, f
+
+    def to_source(self, x: float, y: float) -> tuple[float, float]:
+        """Map a point in rotated-frame coordinates to source-frame coordinates"""
+        a, b, c, d, e, f = self.matrix
+        return a * x + b * y + c, d * x + e * y + f
+
+    def source_bbox(self, region_configs: list[dict]) -> tuple[int, int, int, int]:
+        """
+        Bounding box of the source pixels needed to rebuild the rotated regions
+
+        :param region_configs: Regions in rotated-frame coordinates
+        :return: Tuple(x, y, width, height), aligned to even pixels for yuv420p crops
+        """
+        xs, ys = [], []
+        for region in region_configs:
+            x, y, w, h = region['x'], region['y'], region['width'], region['height']
+            for px, py in ((x, y), (x + w, y), (x, y + h), (x + w, y + h)):
+                sx, sy = self.to_source(px, py)
+                xs.append(sx)
+                ys.append(sy)
+
+        pad = self.BICUBIC_SUPPORT
+        x0 = max(math.floor(min(xs)) - pad, 0)
+        y0 = max(math.floor(min(ys)) - pad, 0)
+        x1 = min(math.ceil(max(xs)) + pad, self.frame_width)
+        y1 = min(math.ceil(max(ys)) + pad, self.frame_height)
+
+        x0, y0 = x0 - x0 % 2, y0 - y0 % 2
+        x1, y1 = min(x1 + x1 % 2, self.frame_width), min(y1 + y1 % 2, self.frame_height)
+
+        if x1 <= x0 or y1 <= y0:
+            raise ValueError(f"Scoreboard regions fall outside the {self.frame_width}x{self.frame_height} frame")
+
+        return x0, y0, x1 - x0, y1 - y0
+
+    def region_warp(self, region_config: dict, origin: tuple[int, int] = (0, 0)) -> np.ndarray:
+        """
+        Inverse affine map from region pixels to source pixels, computed once per region
+
+        :param region_config: Region in rotated-frame coordinates
+        :param origin: Top-left of the source patch the map samples from
+        :return: 2x3 matrix for cv2.warpAffine with WARP_INVERSE_MAP
+        """
+        x, y = region_config['x'], region_config['y']
+        key = (x, y, origin)
+
+        if key not in self._region_warps:
+            a, b, c, d, e, f = self.matrix
+
+            # PIL maps destination pixel centres, cv2 maps pixel indices
+            tx, ty = self.to_source(x + 0.5, y + 0.5)
+            self._region_warps[key] = np.array([
+                [a, b, tx - 0.5 - origin[0]],
+                [d, e, ty - 0.5 - origin[1]],
+            ])
+
+        return self._region_warps[key]
+
+    def extract_region(self, frame, region_config: dict, origin: tuple[int, int] = (0, 0)):
+        """
+        Rotated score region sampled straight from the source frame
+
+        :param frame: Full source frame, or a patch of it starting at `origin`
+        :param region_config: Region in rotated-frame coordinates
+        :param origin: Top-left of `frame` within the full source frame
+        :return: Region of shape (height, width, 3)
+        """
+        size = (region_config['width'], region_config['height'])
+        return cv2.warpAffine(frame, self.region_warp(region_config, origin), size,
+                              flags=cv2.INTER_CUBIC | cv2.WARP_INVERSE_MAP,
+                              borderMode=cv2.BORDER_CONSTANT,
+                              borderValue=(255, 255, 255))
@@ -0,0 +1,124 @@
+import logging
+import multiprocessing
+from multiprocessing import shared_memory
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class SharedFrameRing:
+    """
+    Fixed-slot ring buffer in shared memory between one producer and one consumer process
+
+    The producer copies each frame (or scoreboard patch) into the next free slot; the
+    consumer gets a NumPy view of that slot without any pickling or copying and
+    releases it when done. `put` blocks while every slot is in use, so a slow
+    consumer throttles the decoder instead of letting frames pile up.
+    """
+
+    def __init__(self, slot_count: int, slot_shape: tuple, dtype=np.uint8, context=None):
+        context = context or multiprocessing.get_context("spawn")
+
+        self.slot_count = slot_count
+        self.slot_shape = tuple(slot_shape)
+        self.dtype = np.dtype(dtype)
+        self.slot_bytes = int(np.prod(self.slot_shape)) * self.dtype.itemsize
+
+        self._frames_shm = shared_memory.SharedMemory(create=True, size=self.slot_count * self.slot_bytes)
+        self._timestamps_shm = shared_memory.SharedMemory(create=True, size=self.slot_count * 8)
+
+        self._free_slots = context.Semaphore(slot_count)
+        self._filled_slots = context.Semaphore(0)
+        self._written = context.Value('q', 0)
+        self._released = context.Value('q', 0)
+        self._peak_occupancy = context.Value('q', 0)
+        self._full_waits = context.Value('q', 0)
+        self._finished = context.Value('b', 0)
+
+        self._read_count = 0
+        self._attach_views()
+
+    def _attach_views(self):
+        self._frames = np.ndarray((self.slot_count, *self.slot_shape), dtype=self.dtype,
+                                  buffer=self._frames_shm.buf)
+        self._timestamps = np.ndarray((self.slot_count,), dtype=np.float64, buffer=self._timestamps_shm.buf)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_frames'], state['_timestamps']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._attach_views()
+
+    @property
+    def occupancy(self) -> int:
+        """Slots currently written and not yet released by the consumer"""
+        return self._written.value - self._released.value
+
+    @property
+    def peak_occupancy(self) -> int:
+        return self._peak_occupancy.value
+
+    @property
+    def full_waits(self) -> int:
+        """Times the producer found every slot in use and had to wait"""
+        return self._full_waits.value
+
+    def put(self, timestamp: float, frame) -> None:
+        """Producer: copy a frame into the next free slot, blocking while the ring is full"""
+        if not self._free_slots.acquire(block=False):
+            with self._full_waits.get_lock():
+                self._full_waits.value += 1
+            self._free_slots.acquire()
+
+        slot = self._written.value % self.slot_count
+        self._frames[slot] = frame
+        self._timestamps[slot] = timestamp
+
+        with self._written.get_lock():
+            self._written.value += 1
+        self._peak_occupancy.value = max(self._peak_occupancy.value, self.occupancy)
+
+        self._filled_slots.release()
+
+    def put_end(self) -> None:
+        """Producer: mark the stream as finished"""
+        self._finished.value = 1
+        self._filled_slots.release()
+
+    def get(self, timeout: float = None):
+        """
+        Consumer: wait for the next frame
+
+        :param timeout: Seconds to wait, None waits forever
+        :return: Tuple(timestamp, view of the slot), or None once the producer has finished
+        """
+        if not self._filled_slots.acquire(timeout=timeout):
+            raise TimeoutError("Timed out waiting for a frame")
+
+        if self._finished.value and self._read_count == self._written.value:
+            return None
+
+        slot = self._read_count % self.slot_count
+        self._read_count += 1
+
+        return float(self._timestamps[slot]), self._frames[slot]
+
+    def release(self) -> None:
+        """Consumer: hand the oldest slot back to the producer once its view is no longer used"""
+        with self._released.get_lock():
+            self._released.value += 1
+        self._free_slots.release()
+
+    def close(self, unlink: bool = True) -> None:
+        """Detach from the shared memory, and free it when called by the owner"""
+        del self._frames, self._timestamps
+        self._frames_shm.close()
+        self._timestamps_shm.close()
+
+        if unlink:
+            self._frames_shm.unlink()
+            self._timestamps_shm.unlink()
@@ -0,0 +1,72 @@
+import json
+import logging
+import os
+
+from config import METADATA_DIR, CHECKPOINT_INTERVAL, ensure_directories
+
+logger = logging.getLogger(__name__)
+
+
+class GameCheckpoint:
+    """
+    Processing position of one game, saved every `interval` seconds of recording
+
+    A checkpoint holds the timestamp of the last processed sample, the score
+    validator state at that sample and the goal clips queued so far, so an interrupted
+    game resumes right after it instead of from frame zero.
+    """
+
+    ROOT = METADATA_DIR / "checkpoints"
+
+    def __init__(self, game_id: str, interval: float = CHECKPOINT_INTERVAL):
+        ensure_directories()
+        self.game_id = game_id
+        self.interval = interval
+        self.path = self.ROOT / f"{game_id}.json"
+        self._last_saved = None
+
+    def load(self):
+        """
+        :return: Dict(game_id, timestamp, validator, clips) of the last checkpoint, or None
+        """
+        if not self.path.exists():
+            return None
+
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Ignoring unreadable checkpoint {self.path}: {e}")
+            return None
+
+        self._last_saved = state['timestamp']
+        return state
+
+    def due(self, timestamp: float) -> bool:
+        """Whether `interval` seconds of recording have been processed since the last save"""
+        return self._last_saved is None or timestamp - self._last_saved >= self.interval
+
+    def save(self, timestamp: float, validator_state: dict, clips: list[tuple[str, float, float]]) -> None:
+        """Write the checkpoint atomically, so a crash mid-write keeps the previous one"""
+        self.ROOT.mkdir(parents=True, exist_ok=True)
+        state = {
+            'game_id': self.game_id,
+            'timestamp': timestamp,
+            'validator': validator_state,
+            'clips': clips,
+        }
+
+        temp_path = self.path.with_suffix(".tmp")
+        with open(temp_path, 'w') as f:
+            json.dump(state, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+
+        self._last_saved = timestamp
+        logger.info(f"Checkpoint for {self.game_id} at {timestamp:.0f}s")
+
+    def delete(self) -> None:
+        """Drop the checkpoint once the game is fully processed"""
+        self.path.unlink(missing_ok=True)
+        self._last_saved = None
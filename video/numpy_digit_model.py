@@ -0,0 +1,60 @@
+import logging
+from pathlib import Path
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class NumpyDigitModel:
+    """
+    Forward pass of the exported digit model using only NumPy
+
+    Mirrors the part of the Keras model API that ScoreboardReader uses, so it can
+    be swapped in without loading TensorFlow. Weights come from
+    ml/export_numpy_model.py.
+    """
+
+    ACTIVATIONS = {
+        "linear": lambda x: x,
+        "relu": lambda x: np.maximum(x, 0),
+        "softmax": lambda x: NumpyDigitModel._softmax(x),
+    }
+
+    def __init__(self, model_path: Path):
+        with np.load(model_path) as weights:
+            self.ops = [str(op) for op in weights["ops"]]
+            self.kernels = [weights[f"kernel_{i}"] for i in range(self.ops.count("dense"))]
+            self.biases = [weights[f"bias_{i}"] for i in range(self.ops.count("dense"))]
+
+        unknown = [op for op in self.ops if op != "dense" and op not in self.ACTIVATIONS]
+        if unknown:
+            raise ValueError(f"Unsupported layers in {model_path}: {unknown}")
+
+        logger.info(f"Loaded NumPy digit model: {model_path}")
+
+    @staticmethod
+    def _softmax(x):
+        exp = np.exp(x - np.max(x, axis=1, keepdims=True))
+        return exp / np.sum(exp, axis=1, keepdims=True)
+
+    def predict(self, batch, batch_size=None, verbose=0):
+        """
+        Class probabilities for a batch of digit arrays
+
+        :param batch: Array of shape (N, 28, 28, 1)
+        :param batch_size: Ignored, the whole batch is one matmul per layer
+        :param verbose: Ignored, kept for Keras compatibility
+        :return: Array of shape (N, 10)
+        """
+        x = np.asarray(batch, dtype=np.float32).reshape(len(batch), -1)
+
+        dense = 0
+        for op in self.ops:
+            if op == "dense":
+                x = x @ self.kernels[dense] + self.biases[dense]
+                dense += 1
+            else:
+                x = self.ACTIVATIONS[op](x)
+
+        return x
@@ -0,0 +1,123 @@
+import logging
+import sqlite3
+import zlib
+
+import numpy as np
+
+from config import METADATA_DIR, INFERENCE_BATCH_SIZE, ensure_directories
+
+logger = logging.getLogger(__name__)
+
+
+class ReadStore:
+    """
+    SQLite log of every score read of every game
+
+    Reads are buffered and written in one transaction per batch while a game is
+    analyzed. The recording can then be deleted and validation re-run later
+    from the stored timeline without decoding anything.
+    """
+
+    def __init__(self, db_path=None, batch_size: int = INFERENCE_BATCH_SIZE):
+        ensure_directories()
+        self.db_path = db_path or METADATA_DIR / "reads.sqlite3"
+        self.batch_size = batch_size
+        self.game_id = None
+        # Added to every timestamp, for recordings analyzed one segment at a time
+        self.timestamp_offset = 0.0
+        self._pending = []
+
+        self._connection = sqlite3.connect(self.db_path)
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS reads (
+                game TEXT NOT NULL,
+                timestamp REAL NOT NULL,
+                region INTEGER NOT NULL,
+                digit INTEGER NOT NULL,
+                confidence REAL NOT NULL,
+                roi_hash INTEGER
+            )""")
+        self._connection.execute("CREATE INDEX IF NOT EXISTS reads_by_game ON reads (game, region, timestamp)")
+        self._connection.commit()
+
+    @staticmethod
+    def roi_hash(roi) -> int:
+        """Cheap fingerprint of a raw score region, equal for byte-identical regions"""
+        return zlib.crc32(np.ascontiguousarray(roi).data)
+
+    def begin_game(self, game_id: str, resume_after: float = None) -> None:
+        """
+        Start logging reads for a game, replacing any reads stored for it before
+
+        :param resume_after: Keep the reads up to this timestamp, for a game resumed from a checkpoint
+        """
+        self.end_game()
+        self.game_id = game_id
+        self.timestamp_offset = 0.0
+
+        with self._connection:
+            if resume_after is None:
+                self._connection.execute("DELETE FROM reads WHERE game = ?", (game_id,))
+            else:
+                self._connection.execute("DELETE FROM reads WHERE game = ? AND timestamp > ?",
+                                         (game_id, resume_after))
+
+    def add_sample(self, timestamp: float, scores: list[int], confidences: list[float], roi_hashes=None) -> None:
+        """
+        Buffer the reads of one sample for the current game
+
+        :param timestamp: Seconds from the start of the recording (or segment, see timestamp_offset)
+        :param scores: Digit read per region
+        :param confidences: Softmax confidence per region
+        :param roi_hashes: roi_hash per region, None when the raw regions were not kept
+        """
+        if self.game_id is None:
+            return
+
+        roi_hashes = roi_hashes or [None] * len(scores)
+        timestamp += self.timestamp_offset
+        self._pending.extend((self.game_id, timestamp, region, score, confidence, roi_hash)
+                             for region, (score, confidence, roi_hash)
+                             in enumerate(zip(scores, confidences, roi_hashes)))
+
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+
+        with self._connection:
+            self._connection.executemany("INSERT INTO reads VALUES (?, ?, ?, ?, ?, ?)", self._pending)
+        self._pending = []
+
+    def end_game(self) -> None:
+        """Write any buffered reads and stop logging"""
+        self.flush()
+        if self.game_id is not None:
+            logger.info(f"Stored reads of {self.game_id} in {self.db_path}")
+        self.game_id = None
+
+    def games(self) -> list[str]:
+        return [row[0] for row in self._connection.execute("SELECT DISTINCT game FROM reads ORDER BY game")]
+
+    def load_timeline(self, game_id: str, region: int = 0):
+        """
+        Stored reads of one region of a game
+
+        :param region: Index of the region in the region configs the game was read with
+        :return: Tuple(timestamps, digits, confidences) as NumPy arrays, in timestamp order
+        """
+        rows = self._connection.execute(
+            "SELECT timestamp, digit, confidence FROM reads WHERE game = ? AND region = ? ORDER BY timestamp",
+            (game_id, region)).fetchall()
+
+        if not rows:
+            return np.empty(0), np.empty(0, dtype=int), np.empty(0)
+
+        timestamps, digits, confidences = zip(*rows)
+        return np.array(timestamps), np.array(digits, dtype=int), np.array(confidences)
+
+    def close(self) -> None:
+        self.end_game()
+        self._connection.close()
@@ -0,0 +1,130 @@
+import json
+import logging
+import subprocess
+import tempfile
+from pathlib import Path
+
+from config import CLIPS_DIR, ensure_directories
+from video.ffmpeg_utils import encoder_args, run_ffmpeg
+
+logger = logging.getLogger(__name__)
+
+
+class ReelBuilder:
+    """
+    Join the goal clips of a game into one highlight reel
+
+    Clips cut from the same recording share their codec parameters, so the
+    reel is normally a stream copy through the concat demuxer and takes about
+    as long as copying the files. Only when the clips differ (e.g. recorded
+    with different settings) is the reel re-encoded, in a single pass that
+    scales every clip to the first one's size and frame rate.
+    """
+
+    # Stream fields that must match for the concat demuxer to copy the clips as they are
+    STREAM_FIELDS = ("codec_type", "codec_name", "profile", "level", "width", "height", "pix_fmt",
+                     "sample_aspect_ratio", "r_frame_rate", "time_base", "sample_rate", "channels")
+
+    def __init__(self, clips_dir=CLIPS_DIR):
+        ensure_directories()
+        self.clips_dir = Path(clips_dir)
+
+    def build(self, clip_file_names: list[str], reel_file_name: str) -> bool:
+        """
+        Concatenate clips, in the order given, into a reel in the clips folder
+
+        :param clip_file_names: Clips in the clips folder, in timestamp order. Missing clips are skipped.
+        :param reel_file_name: Reel to write in the clips folder
+        :return: True if the reel was created
+        """
+        clip_paths = [self.clips_dir / name for name in clip_file_names]
+        missing = [path.name for path in clip_paths if not path.exists()]
+        if missing:
+            logger.warning(f"Leaving missing clips out of {reel_file_name}: {', '.join(missing)}")
+            clip_paths = [path for path in clip_paths if path.exists()]
+
+        if not clip_paths:
+            logger.info(f"No clips for {reel_file_name}")
+            return False
+
+        reel_path = self.clips_dir / reel_file_name
+        streams = [self._stream_params(path) for path in clip_paths]
+
+        if all(clip_streams == streams[0] for clip_streams in streams):
+            created = self._concat_copy(clip_paths, reel_path)
+            method = "stream copy"
+        else:
+            created = self._concat_encode(clip_paths, reel_path, streams[0])
+            method = "re-encoded, clip formats differ"
+
+        if created:
+            logger.info(f"Reel created: {reel_file_name} from {len(clip_paths)} clips ({method})")
+        return created
+
+    def _stream_params(self, clip_path: Path) -> list[dict]:
+        """Codec parameters of every stream of a clip, limited to STREAM_FIELDS"""
+        cmd = [
+            "ffprobe",
+            "-v", "error",
+            "-show_entries", f"stream={','.join(self.STREAM_FIELDS)}",
+            "-of", "json",
+            str(clip_path),
+        ]
+
+        result = subprocess.run(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+
+        if result.returncode != 0:
+            raise RuntimeError(f"ffprobe failed on {clip_path.name}:\n{result.stderr}")
+
+        return json.loads(result.stdout).get("streams", [])
+
+    def _concat_copy(self, clip_paths: list[Path], reel_path: Path) -> bool:
+        with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as concat_list:
+            for clip_path in clip_paths:
+                concat_list.write(f"file '{clip_path.resolve()}'\n")
+
+        cmd = [
+            "ffmpeg",
+            "-y",
+            "-f", "concat",
+            "-safe", "0",
+            "-i", concat_list.name,
+            "-c", "copy",
+            "-movflags", "+faststart",
+            str(reel_path),
+        ]
+
+        try:
+            return run_ffmpeg(cmd, "reel")
+        finally:
+            Path(concat_list.name).unlink()
+
+    def _concat_encode(self, clip_paths: list[Path], reel_path: Path, first_streams: list[dict]) -> bool:
+        video = next(stream for stream in first_streams if stream["codec_type"] == "video")
+        width, height, fps = video["width"], video["height"], video["r_frame_rate"]
+
+        cmd = ["ffmpeg", "-y"]
+        for clip_path in clip_paths:
+            cmd += ["-i", str(clip_path)]
+
+        # Fit every clip into the first clip's frame so the concat filter gets matching inputs
+        filters = [f"[{i}:v:0]scale={width}:{height}:force_original_aspect_ratio=decrease,"
+                   f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,setsar=1,fps={fps}[v{i}]"
+                   for i in range(len(clip_paths))]
+        inputs = "".join(f"[v{i}]" for i in range(len(clip_paths)))
+        filters.append(f"{inputs}concat=n={len(clip_paths)}:v=1:a=0[reel]")
+
+        cmd += [
+            "-filter_complex", ";".join(filters),
+            "-map", "[reel]",
+            *encoder_args(),
+            "-movflags", "+faststart",
+            str(reel_path),
+        ]
+
+        return run_ffmpeg(cmd, "reel")
@@ -0,0 +1,123 @@
+import json
+import logging
+import shutil
+
+import numpy as np
+
+from config import METADATA_DIR
+
+logger = logging.getLogger(__name__)
+
+
+class RoiArchive:
+    """
+    Raw score regions of one game, kept as memory-mapped .npy stacks
+
+    Each region gets a (samples, height, width, 3) BGR stack of the rotated
+    region exactly as it goes into ScoreboardFinder.preprocess_region, next to
+    the sample timestamps and the region configs it was cut with. That is all
+    preprocessing and the digit model need, so a retrained model or a new
+    preprocessing profile can be checked on old games without the recording.
+    """
+
+    ROOT = METADATA_DIR / "roi_archive"
+
+    def __init__(self, game_id: str, root=None):
+        self.game_id = game_id
+        self.path = (root or self.ROOT) / game_id
+        self._regions = None
+        self._timestamps = None
+
+    @property
+    def timestamps_path(self):
+        return self.path / "timestamps.npy"
+
+    def _region_path(self, index: int):
+        return self.path / f"region_{index}.npy"
+
+    def exists(self) -> bool:
+        return self.timestamps_path.exists()
+
+    def create(self, region_configs: list[dict], capacity: int) -> None:
+        """
+        Start a new archive, replacing any previous one for this game
+
+        :param region_configs: Score regions that will be appended for every sample
+        :param capacity: Most samples that will be appended
+        """
+        self.delete()
+        self.path.mkdir(parents=True)
+
+        with open(self.path / "regions.json", 'w') as f:
+            json.dump(region_configs, f, indent=2)
+
+        self._regions = [np.lib.format.open_memmap(self._region_path(i), mode='w+', dtype=np.uint8,
+                                                   shape=(capacity, region['height'], region['width'], 3))
+                         for i, region in enumerate(region_configs)]
+        self._timestamps = []
+
+    def append(self, timestamp: float, regions: list) -> None:
+        """Store one sample's rotated score regions, in region config order"""
+        sample = len(self._timestamps)
+        if self._regions and sample >= len(self._regions[0]):
+            # The container's frame count was short; drop samples past the capacity
+            return
+
+        for stack, region in zip(self._regions, regions):
+            stack[sample] = region
+        self._timestamps.append(timestamp)
+
+    def reopen(self, resume_after: float) -> None:
+        """
+        Continue an archive whose game is being resumed from a checkpoint
+
+        Samples after `resume_after` are dropped, since they will be decoded again.
+        """
+        with open(self.path / "regions.json") as f:
+            region_count = len(json.load(f))
+
+        timestamps = np.load(self.timestamps_path)
+        self._timestamps = timestamps[timestamps <= resume_after].tolist()
+        self._regions = [np.load(self._region_path(i), mmap_mode='r+') for i in range(region_count)]
+
+    def flush(self) -> None:
+        """Write the stacks and timestamps so far, making them survive a crash"""
+        if self._regions is None:
+            return
+
+        for stack in self._regions:
+            stack.flush()
+        np.save(self.timestamps_path, np.array(self._timestamps, dtype=np.float64))
+
+    def close(self) -> None:
+        """Flush the stacks; only the samples listed in timestamps.npy are valid"""
+        if self._regions is None:
+            return
+
+        self.flush()
+
+        size_kb = sum(path.stat().st_size for path in self.path.iterdir()) / 1024
+        logger.info(f"Archived {len(self._timestamps)} samples of {self.game_id} ({size_kb:.0f} KB)")
+
+        self._regions = None
+        self._timestamps = None
+
+    def load(self):
+        """
+        Open the archive read-only without loading the stacks into memory
+
+        :return: Tuple(timestamps, list of memory-mapped region stacks, region configs)
+        """
+        timestamps = np.load(self.timestamps_path)
+
+        with open(self.path / "regions.json") as f:
+            region_configs = json.load(f)
+
+        stacks = [np.load(self._region_path(i), mmap_mode='r')[:len(timestamps)]
+                  for i in range(len(region_configs))]
+
+        return timestamps, stacks, region_configs
+
+    def delete(self) -> None:
+        if self.path.exists():
+            shutil.rmtree(self.path)
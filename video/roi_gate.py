@@ -0,0 +1,61 @@
+import logging
+
+import numpy as np
+
+from config import ROI_CHANGE_THRESHOLD
+
+logger = logging.getLogger(__name__)
+
+
+class RoiChangeGate:
+    """
+    Skip preprocessing and inference while a score region has not changed
+
+    Each raw region is diff-scored against the last region that was actually
+    classified for the same key. Below the threshold, that classification is
+    reused instead of running the finder and model again.
+    """
+
+    def __init__(self, threshold: float = ROI_CHANGE_THRESHOLD):
+        self.threshold = threshold
+        self._references = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def difference(roi_a, roi_b) -> float:
+        """Mean absolute pixel difference between two regions"""
+        return float(np.mean(np.abs(roi_a.astype(np.int16) - roi_b.astype(np.int16))))
+
+    def match(self, key, roi):
+        """
+        Look up the classification to reuse for a region
+
+        :param key: Identifies the region (e.g. its x/y in the field config)
+        :param roi: Raw extracted region
+        :return: The stored read if the region is unchanged, otherwise None
+        """
+        reference = self._references.get(key)
+
+        if reference is not None:
+            reference_roi, read = reference
+            if reference_roi.shape == roi.shape and self.difference(reference_roi, roi) <= self.threshold:
+                self.hits += 1
+                return read
+
+        self.misses += 1
+        return None
+
+    def remember(self, key, roi, read):
+        """Make `roi` the reference for `key`, with `read` holding its classification"""
+        self._references[key] = (roi.copy(), read)
+
+    def reset(self):
+        self._references.clear()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
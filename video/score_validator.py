@@ -1,33 +1,134 @@
+import numpy as np
+
+from config import HIGH_CONFIDENCE, LOW_CONFIDENCE, CONFIDENT_STABLE, UNSURE_STABLE
+
+
 class ScoreValidator:
+    """
+    Confirm a new score once it has been read on enough consecutive samples
 
-    def __init__(self, required_stable: int = 3):
+    How many reads are enough depends on the least confident read of the new
+    score: `confident_stable` while every read is at or above HIGH_CONFIDENCE,
+    `unsure_stable` once any read falls below LOW_CONFIDENCE, and
+    `required_stable` in between. Reads without a confidence count as in between.
+    """
+
+    def __init__(self, required_stable: int = 3, confident_stable: int = CONFIDENT_STABLE,
+                 unsure_stable: int = UNSURE_STABLE):
         self.required_stable = required_stable
+        self.confident_stable = confident_stable
+        self.unsure_stable = unsure_stable
         self.last_valid_score = 0
         self.current_candidate = None
         self.frames_stable = 0
+        self.candidate_confidence = None
 
-    def validate_score(self, frame_score: int) -> bool:
+    def validate_score(self, frame_score: int, confidence: float = None) -> bool:
 
         if frame_score <= self.last_valid_score:
             self._reset_candidate()
             return False
 
+        if confidence is None:
+            confidence = LOW_CONFIDENCE
+
         if frame_score != self.current_candidate:
             self.current_candidate = frame_score
             self.frames_stable = 1
+            self.candidate_confidence = confidence
         else:
             self.frames_stable += 1
+            self.candidate_confidence = min(self.candidate_confidence, confidence)
 
-        if self.frames_stable >= self.required_stable:
+        if self.frames_stable >= self.stable_reads_needed(self.candidate_confidence):
             self.last_valid_score = self.current_candidate
             self._reset_candidate()
             return True
 
         return False
 
+    @staticmethod
+    def _confidence_band(confidence):
+        """0 for confident, 1 for in between, 2 for unsure reads (scalar or array)"""
+        return (confidence < HIGH_CONFIDENCE).astype(int) + (confidence < LOW_CONFIDENCE)
+
+    def stable_reads_needed(self, confidence: float) -> int:
+        """Consecutive reads needed for a candidate whose least confident read had `confidence`"""
+        return (self.confident_stable, self.required_stable, self.unsure_stable)[
+            self._confidence_band(np.float64(confidence))]
+
     def get_last_valid_score(self):
         return self.last_valid_score
 
+    def get_state(self) -> dict:
+        """Everything needed to continue validating from this point, as JSON-friendly values"""
+        return {
+            'last_valid_score': self.last_valid_score,
+            'current_candidate': self.current_candidate,
+            'frames_stable': self.frames_stable,
+            'candidate_confidence': self.candidate_confidence,
+        }
+
+    def load_state(self, state: dict):
+        self.last_valid_score = state['last_valid_score']
+        self.current_candidate = state['current_candidate']
+        self.frames_stable = state['frames_stable']
+        self.candidate_confidence = state['candidate_confidence']
+
+    def reset(self):
+        """Start a new game from 0"""
+        self.last_valid_score = 0
+        self._reset_candidate()
+
     def _reset_candidate(self):
         self.current_candidate = None
-        self.frames_stable = 0
\ No newline at end of file
+        self.frames_stable = 0
+        self.candidate_confidence = None
+
+    def validate_timeline(self, timestamps, scores, confidences=None, last_valid_score: int = 0):
+        """
+        Validate a whole timeline of reads at once, with the same events as calling validate_score per read
+
+        A run of equal scores is confirmed on its first read where the run so far
+        is long enough for its least confident read, if the score is above every
+        score confirmed before it. Any earlier run that got that far has either
+        been confirmed or was not above a confirmed score, so "above every earlier
+        such run" is the same test and needs no per-read state.
+
+        :param timestamps: Timestamp of each read
+        :param scores: Score read at each timestamp
+        :param confidences: Softmax confidence of each read, None treats every read as in between
+        :param last_valid_score: Score already confirmed before the first read
+        :return: Tuple(timestamps of confirmed goals, confirmed scores)
+        """
+        timestamps = np.asarray(timestamps)
+        scores = np.asarray(scores)
+        if len(scores) == 0:
+            return timestamps[:0], scores[:0]
+
+        if confidences is None:
+            confidences = np.full(len(scores), LOW_CONFIDENCE)
+
+        is_run_start = np.concatenate(([True], scores[1:] != scores[:-1]))
+        run_starts = np.flatnonzero(is_run_start)
+        run_ids = np.cumsum(is_run_start) - 1
+
+        # Band of the least confident read so far, restarting with every run: lifting
+        # each run above all earlier ones keeps one cumulative maximum from reaching
+        # back across runs
+        offsets = 3 * run_ids
+        run_band = np.maximum.accumulate(self._confidence_band(np.asarray(confidences)) + offsets) - offsets
+
+        needed = np.array([self.confident_stable, self.required_stable, self.unsure_stable])[run_band]
+        reads_in_run = np.arange(len(scores)) - run_starts[run_ids] + 1
+        ready = np.flatnonzero(reads_in_run >= needed)
+
+        # First ready read of each run
+        _, first = np.unique(run_ids[ready], return_index=True)
+        candidates = ready[first]
+        candidate_scores = scores[candidates]
+
+        previous_best = np.maximum.accumulate(np.concatenate(([last_valid_score], candidate_scores[:-1])))
+        confirmed = candidate_scores > previous_best
+
+        return timestamps[candidates[confirmed]], candidate_scores[confirmed]
@@ -4,21 +4,61 @@ import logging
 
 from PIL import Image
 
+from video import batch_ops
+from video.field_profile import FieldProfile
+
 logger = logging.getLogger(__name__)
 
 class ScoreboardFinder:
 
+    # Preprocessing chains, from most to least work:
+    #   full    - denoise, CLAHE, sharpen, Otsu, morphology
+    #   fast    - full without fastNlMeansDenoising
+    #   minimal - Otsu and morphology on the upscaled grayscale region
+    PREPROCESS_PROFILES = ("full", "fast", "minimal")
+    DEFAULT_PREPROCESS_PROFILE = "full"
+
+    # Profiles `preprocess_batch` is faster for; full spends its time denoising patch by patch either way
+    BATCHED_PROFILES = ("fast", "minimal")
+
+    def __init__(self):
+        self._profiles = {}
+
+    def get_profile(self, rotation_angle: int, frame_width: int, frame_height: int) -> FieldProfile:
+        """Field profile for a rotation and frame size, built once and reused"""
+        key = (rotation_angle, frame_width, frame_height)
+        if key not in self._profiles:
+            self._profiles[key] = FieldProfile(rotation_angle, frame_width, frame_height)
+
+        return self._profiles[key]
+
+    def extract_region(self, frame, region_config, rotation_angle: int, origin=(0, 0), frame_size=None):
+        """
+        Extract the rotated score region without rotating the whole frame
+
+        :param frame: Original Video Frame, or a scoreboard patch of it
+        :param region_config: Region of interest
+        :param rotation_angle: Degrees to rotate (neg = clockwise)
+        :param origin: Top-left of `frame` within the original frame
+        :param frame_size: Tuple(width, height) of the original frame, defaults to `frame`'s size
+        :return: Region of shape (height, width, 3)
+        """
+        if frame_size is None:
+            frame_size = (frame.shape[1], frame.shape[0])
+
+        profile = self.get_profile(rotation_angle, *frame_size)
+        return profile.extract_region(frame, region_config, origin)
+
     @staticmethod
-    def preprocess_scoreboard_region(frame, region_config, rotation_angle: int):
+    def extract_region_full_rotation(frame, region_config, rotation_angle: int):
         """
-        Extract and preprocess the scoreboard region
+        Reference extraction: rotate the whole frame with PIL, then slice the region
 
         :param frame: Original Video Frame
         :param region_config: Region of interest
-        :param rotation_angle:  Degrees to rotate (neg = clockwise)
-        :return: Tuple(binary, rotated)
+        :param rotation_angle: Degrees to rotate (neg = clockwise)
+        :return: Region of shape (height, width, 3)
         """
-
         frame_img = Image.fromarray(frame)
         frame_rotated = frame_img.rotate(rotation_angle, expand=True,
                                  resample=Image.Resampling.BICUBIC,
@@ -26,7 +66,44 @@ class ScoreboardFinder:
         frame_rotated_array = np.array(frame_rotated)
 
         x, y, w, h = region_config['x'], region_config['y'], region_config['width'], region_config['height']
-        region = frame_rotated_array[y:y+h, x:x+w].copy()
+        return frame_rotated_array[y:y+h, x:x+w].copy()
+
+    def preprocess_scoreboard_region(self, frame, region_config, rotation_angle: int, origin=(0, 0),
+                                     frame_size=None):
+        """
+        Extract and preprocess the scoreboard region
+
+        :param frame: Original Video Frame, or a scoreboard patch of it
+        :param region_config: Region of interest
+        :param rotation_angle:  Degrees to rotate (neg = clockwise)
+        :param origin: Top-left of `frame` within the original frame
+        :param frame_size: Tuple(width, height) of the original frame, defaults to `frame`'s size
+        :return: Binary digit image
+        """
+        region = self.extract_region(frame, region_config, rotation_angle, origin, frame_size)
+        return self.preprocess_region(region, self.preprocess_profile(region_config))
+
+    @classmethod
+    def preprocess_profile(cls, region_config) -> str:
+        """Preprocessing profile pinned for a region in FIELD_CONFIGS, `full` if none is set"""
+        return region_config.get('preprocess_profile', cls.DEFAULT_PREPROCESS_PROFILE)
+
+    @classmethod
+    def _check_profile(cls, profile: str):
+        if profile not in cls.PREPROCESS_PROFILES:
+            raise ValueError(f"Unknown preprocessing profile '{profile}', expected one of {cls.PREPROCESS_PROFILES}")
+
+    @classmethod
+    def preprocess_region(cls, region, profile: str = DEFAULT_PREPROCESS_PROFILE):
+        """
+        Preprocess an extracted score region into a binary digit image
+
+        :param region: Rotated score region (BGR)
+        :param profile: One of PREPROCESS_PROFILES
+        :return: Binary digit image
+        """
+        cls._check_profile(profile)
+        h, w = region.shape[:2]
 
         region_rgb = cv2.cvtColor(region, cv2.COLOR_BGR2RGB)
         pli_img = Image.fromarray(region_rgb)
@@ -38,14 +115,17 @@ class ScoreboardFinder:
         pli_img_array = np.array(pli_img)
 
         gray = cv2.cvtColor(pli_img_array, cv2.COLOR_RGB2GRAY)
-        denoised = cv2.fastNlMeansDenoising(gray, h=10)
-        clahe = cv2.createCLAHE(clipLimit=3.0, tileGridSize=(4, 4))
-        enhanced = clahe.apply(denoised)
-        kernel_sharpen = np.array([[-1, -1, -1],
-                                   [-1, 9, -1],
-                                   [-1, -1, -1]])
-        sharpened = cv2.filter2D(enhanced, -1, kernel_sharpen)
 
+        if profile == "minimal":
+            sharpened = gray
+        else:
+            denoised = cv2.fastNlMeansDenoising(gray, h=10) if profile == "full" else gray
+            clahe = cv2.createCLAHE(clipLimit=3.0, tileGridSize=(4, 4))
+            enhanced = clahe.apply(denoised)
+            kernel_sharpen = np.array([[-1, -1, -1],
+                                       [-1, 9, -1],
+                                       [-1, -1, -1]])
+            sharpened = cv2.filter2D(enhanced, -1, kernel_sharpen)
 
         _, binary = cv2.threshold(sharpened, 0, 255,
                                   cv2.THRESH_BINARY + cv2.THRESH_OTSU)
@@ -62,4 +142,50 @@ class ScoreboardFinder:
         kernel_dilate = np.ones((2, 2), np.uint8)
         dilated = cv2.dilate(closed, kernel_dilate, iterations=1)
 
-        return dilated
\ No newline at end of file
+        return dilated
+
+    @classmethod
+    def preprocess_batch(cls, regions, output_size: int = 28, profile: str = DEFAULT_PREPROCESS_PROFILE):
+        """
+        Preprocess a stack of extracted score regions into model-sized digit images
+
+        Same chain as `preprocess_region` followed by the reader's resize, but
+        the resize, grayscale, sharpen, Otsu and morphology steps run once over
+        the whole stack. Denoising and CLAHE depend on each patch's neighbourhood
+        and tiles, so they still run per patch.
+
+        :param regions: Rotated score regions of shape (N, height, width, 3), BGR
+        :param output_size: Side of the square model input
+        :param profile: One of PREPROCESS_PROFILES
+        :return: Binary digit images of shape (N, output_size, output_size)
+        """
+        cls._check_profile(profile)
+        regions = np.asarray(regions)
+        count, h, w = regions.shape[:3]
+        if count == 0:
+            return np.empty((0, output_size, output_size), dtype=np.uint8)
+
+        scale_factor = 4
+        upscaled = batch_ops.resize_lanczos(regions, w * scale_factor, h * scale_factor)
+
+        gray = cv2.cvtColor(upscaled.reshape(-1, w * scale_factor, 3), cv2.COLOR_BGR2GRAY)
+        gray = gray.reshape(count, h * scale_factor, w * scale_factor)
+
+        if profile == "minimal":
+            binary = batch_ops.otsu_threshold(gray)
+        else:
+            if profile == "full":
+                gray = np.stack([cv2.fastNlMeansDenoising(patch, h=10) for patch in gray])
+
+            clahe = cv2.createCLAHE(clipLimit=3.0, tileGridSize=(4, 4))
+            enhanced = np.stack([clahe.apply(patch) for patch in gray])
+            binary = batch_ops.otsu_threshold(batch_ops.sharpen(enhanced))
+
+        inverted = binary.reshape(count, -1).mean(axis=1) < 127
+        binary[inverted] = 255 - binary[inverted]
+
+        cleaned = batch_ops.dilate(batch_ops.erode(binary, 2), 2)
+        closed = batch_ops.erode(batch_ops.dilate(cleaned, 3, iterations=2), 3, iterations=2)
+        dilated = batch_ops.dilate(closed, 2)
+
+        return batch_ops.resize_area(dilated, output_size, output_size)
@@ -2,16 +2,26 @@ import logging
 from pathlib import Path
 
 import cv2
-import keras
 import numpy as np
 
+from config import DIGIT_MODEL_BACKEND
+from video.numpy_digit_model import NumpyDigitModel
+
 logger = logging.getLogger(__name__)
 
 class ScoreboardReader:
 
-    def __init__(self):
-        model_path = Path("ml/digit_model.keras")
-        self.model = keras.models.load_model(model_path)
+    def __init__(self, backend: str = DIGIT_MODEL_BACKEND):
+        self.backend = backend
+
+        if backend == "numpy":
+            self.model = NumpyDigitModel(Path("ml/digit_model.npz"))
+        elif backend == "keras":
+            import keras
+            model_path = Path("ml/digit_model.keras")
+            self.model = keras.models.load_model(model_path)
+        else:
+            raise ValueError(f"Unknown digit model backend: {backend}")
 
     @staticmethod
     def _prepare_digit(img):
@@ -26,11 +36,43 @@ class ScoreboardReader:
         return arr
 
     def get_scores(self, home_img, away_img):
-        home_arr, away_arr = self._prepare_digit(home_img), self._prepare_digit(away_img)
-
-        return (np.argmax(self.model.predict(home_arr, verbose=0)),
-                np.argmax(self.model.predict(away_arr, verbose=0)))
+        home_read, away_read = self.get_scores_batch([home_img, away_img])
+        return home_read, away_read
 
     def get_score(self, img):
-        img_arr = self._prepare_digit(img)
-        return np.argmax(self.model.predict(img_arr, verbose=0))
\ No newline at end of file
+        """
+        Classify one digit image
+
+        :return: Tuple(predicted digit, softmax confidence)
+        """
+        digits, confidences = self.predict_batch([img])
+        return int(digits[0]), float(confidences[0])
+
+    def predict_batch(self, imgs):
+        """
+        Classify many digit images with a single forward pass
+
+        :param imgs: Preprocessed digit images, or a (N, 28, 28) stack from ScoreboardFinder.preprocess_batch
+        :return: Tuple(predicted digits, softmax confidence of each prediction), in input order
+        """
+        if len(imgs) == 0:
+            return np.empty(0, dtype=int), np.empty(0, dtype=np.float32)
+
+        if isinstance(imgs, np.ndarray) and imgs.shape[1:] == (28, 28):
+            batch = np.expand_dims(imgs.astype("float32") / 255.0, axis=-1)
+        else:
+            batch = np.concatenate([self._prepare_digit(img) for img in imgs])
+
+        predictions = self.model.predict(batch, batch_size=len(imgs), verbose=0)
+
+        return np.argmax(predictions, axis=1), np.max(predictions, axis=1)
+
+    def get_scores_batch(self, imgs) -> list[tuple[int, float]]:
+        """
+        Classify many digit images with a single forward pass
+
+        :param imgs: Preprocessed digit images
+        :return: Tuple(predicted digit, softmax confidence) per image, in input order
+        """
+        digits, confidences = self.predict_batch(imgs)
+        return [(int(digit), float(confidence)) for digit, confidence in zip(digits, confidences)]
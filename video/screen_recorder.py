@@ -1,51 +1,150 @@
+import csv
+import json
 import logging
 import subprocess
+import time
 from pathlib import Path
 
-from config import RECORDING_FPS, VIDEO_SIZE
+from config import RECORDING_FPS, SEGMENT_DURATION
+from video.capture_backend import CaptureBackend
+from video.ffmpeg_utils import encoder_args
 
 logger = logging.getLogger(__name__)
 
 
 class ScreenRecorder:
 
-    def __init__(self, output_folder="data/recordings"):
+    def __init__(self, output_folder="data/recordings", capture_backend: CaptureBackend = None):
+        self.capture_backend = capture_backend or CaptureBackend()
         self.output_folder = Path(output_folder)
         self.output_folder.mkdir(parents=True, exist_ok=True)
         self.recording_process = None
         self.output_path = None
+        self.segment_dir = None
+        self.manifest_path = None
+        self.segments = []
+        self.ring_size = 0
+        self.recording_deadline = None
 
-    def _build_command(self, duration):
-        """Build command for macOS using ffmpeg"""
+    def _input_args(self, duration):
+        """Capture input of the configured backend"""
+        return self.capture_backend.input_args(duration)
+
+    @staticmethod
+    def _roi_encoder_args():
+        return [
+            '-c:v', 'libx264',
+            '-preset', 'ultrafast',  # the stream is tiny; spend no CPU on compression
+            '-qp', '0',              # lossless
+            '-pix_fmt', 'yuv420p',   # the recording's chroma resolution, so both decode to the same colors
+        ]
+
+    @staticmethod
+    def _chroma_aligned(bbox, width: int, height: int) -> tuple[int, int, int, int]:
+        """Grow Tuple(x, y, width, height) to even edges, on the 4:2:0 chroma grid of the full recording"""
+        x, y, w, h = bbox
+        left, top = x - x % 2, y - y % 2
+        right, bottom = min(x + w + (x + w) % 2, width), min(y + h + (y + h) % 2, height)
+        return left, top, right - left, bottom - top
+
+    @staticmethod
+    def roi_stream_paths(video_path: Path) -> tuple[Path, Path]:
+        """Scoreboard stream recorded next to `video_path`, and the JSON that places it in the full frame"""
+        return video_path.with_suffix('.roi.mp4'), video_path.with_suffix('.roi.json')
+
+    def _build_command(self, duration, roi_bbox=None):
+        """
+        Build command that records to a single MP4
+
+        With a `roi_bbox` the captured frames are split, and the same process
+        also writes just that box of every frame to a small lossless stream.
+        """
+
+        if roi_bbox is None:
+            split_args, roi_args = [], []
+        else:
+            x, y, w, h = roi_bbox
+            roi_path, _ = self.roi_stream_paths(self.output_path)
+            split_args = [
+                '-filter_complex', f'[0:v]split=2[full][roi];[roi]crop={w}:{h}:{x}:{y}[scoreboard]',
+                '-map', '[full]',
+            ]
+            roi_args = [
+                '-map', '[scoreboard]',
+                *self._roi_encoder_args(),
+                '-movflags', '+faststart',
+                str(roi_path),
+            ]
 
         cmd = [
             'ffmpeg',
-            '-f', 'avfoundation',
-            '-framerate', str(RECORDING_FPS),
-            '-video_size', VIDEO_SIZE,
-            '-t', str(duration),
-            '-i', '1',
+            *self._input_args(duration),
+
+            *split_args,
 
             # Encoder settings
-            '-c:v', 'libx264',
-            '-preset', 'veryfast',   # "slow" wastes CPU with no gain for screen content
-            '-crf', '18',            # visually lossless
-            '-pix_fmt', 'yuv420p',
-            '-profile:v', 'high',
-            '-level', '4.2',
+            *encoder_args(),
 
             # smoother seeking
             '-movflags', '+faststart',
 
-            str(self.output_path)
+            str(self.output_path),
+
+            *roi_args,
         ]
 
         return cmd
 
-    def record_for_duration(self, team_name: str, game_date: str, duration: int) -> bool:
+    def _build_segment_command(self, duration, segment_duration, ring_size=0):
+        """Build command that writes closed MPEG-TS segments plus a CSV manifest"""
+
+        # Reuse ring_size segment file names in turn, so old segments get overwritten
+        wrap_args = ['-segment_wrap', str(ring_size)] if ring_size else []
+
+        cmd = [
+            'ffmpeg',
+            *self._input_args(duration),
+            *encoder_args(),
+
+            # Keyframe on every boundary so segments split exactly and decode standalone
+            '-force_key_frames', f'expr:gte(t,n_forced*{segment_duration})',
+
+            '-f', 'segment',
+            '-segment_time', str(segment_duration),
+            '-segment_time_delta', str(1 / (2 * RECORDING_FPS)),
+            '-segment_format', 'mpegts',
+            '-segment_list', str(self.manifest_path),
+            '-segment_list_type', 'csv',
+            '-reset_timestamps', '1',
+            *wrap_args,
+
+            str(self.segment_dir / 'segment_%04d.ts')
+        ]
+
+        return cmd
+
+    def record_for_duration(self, team_name: str, game_date: str, duration: int, roi_bbox=None,
+                            frame_size: tuple[int, int] = None) -> bool:
+        """
+        Record to data/recordings/{team_name}_{date}.mp4
+
+        :param roi_bbox: Tuple(x, y, width, height) of the captured frame to also record on its own, see
+                         roi_stream_paths. None records the full stream only.
+        :param frame_size: Tuple(width, height) of the captured frame `roi_bbox` was measured on
+        """
         safe_date = game_date.replace("-", "")
         self.output_path = self.output_folder / f"{team_name}_{safe_date}.mp4"
-        cmd = self._build_command(duration)
+
+        # A scoreboard stream left by an earlier recording of this game does not match the new one
+        roi_path, placement_path = self.roi_stream_paths(self.output_path)
+        roi_path.unlink(missing_ok=True)
+        placement_path.unlink(missing_ok=True)
+
+        if roi_bbox is not None:
+            width, height = frame_size
+            roi_bbox = self._chroma_aligned(roi_bbox, width, height)
+
+        cmd = self._build_command(duration, roi_bbox)
 
         try:
             result = subprocess.run(
@@ -56,6 +155,11 @@ class ScreenRecorder:
             )
 
             if result.returncode == 0:
+                if roi_bbox is not None:
+                    # Only a finished stream gets the placement that makes analysis use it
+                    with open(placement_path, 'w') as f:
+                        json.dump({'bbox': list(roi_bbox), 'frame_size': [width, height]}, f)
+
                 logger.info("Recording completed successfully")
                 logger.info(f"File saved to: {self.output_path}")
                 return True
@@ -69,4 +173,113 @@ class ScreenRecorder:
             return False
         except Exception as e:
             logger.error(f"An error occurred while recording: {e}")
-            return False
\ No newline at end of file
+            return False
+
+    def start_segmented_recording(self, team_name: str, game_date: str, duration: int,
+                                  segment_duration: int = SEGMENT_DURATION, ring_size: int = 0) -> bool:
+        """
+        Start recording in the background as short segments
+
+        Segments are written to data/recordings/{team_name}_{date}/ and listed in
+        segments.csv as soon as each one is closed.
+
+        :param ring_size: Segment files to keep on disk, reusing them in turn; 0 keeps the whole recording.
+                          Disk use then stays at ring_size segments however long the capture runs.
+        """
+        safe_date = game_date.replace("-", "")
+        self.segment_dir = self.output_folder / f"{team_name}_{safe_date}"
+        self.segment_dir.mkdir(parents=True, exist_ok=True)
+        self.manifest_path = self.segment_dir / "segments.csv"
+        self.manifest_path.unlink(missing_ok=True)
+        self.segments = []
+        self.ring_size = ring_size
+
+        cmd = self._build_segment_command(duration, segment_duration, ring_size)
+
+        try:
+            self.recording_process = subprocess.Popen(
+                cmd,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+            self.recording_deadline = time.monotonic() + duration + 30  # Safety timeout
+            logger.info(f"Segmented recording started: {self.segment_dir}")
+            return True
+
+        except Exception as e:
+            logger.error(f"An error occurred while starting recording: {e}")
+            return False
+
+    def closed_segments(self, poll_interval: float = 2.0):
+        """
+        Yield each segment of the current recording as soon as ffmpeg closes it
+
+        :param poll_interval: Seconds between manifest checks
+        :return: Generator of Tuple(segment file relative to the recordings folder, start, end)
+        """
+        while True:
+            running = self.recording_process is not None and self.recording_process.poll() is None
+
+            if running and time.monotonic() > self.recording_deadline:
+                logger.error("Recording timed out")
+                self.recording_process.kill()
+                self.recording_process.wait()
+                running = False
+
+            for segment in self._read_manifest()[len(self.segments):]:
+                self.segments.append(segment)
+
+                # A ring reuses file names, so a segment the caller fell behind on now holds newer video
+                if self.ring_size and segment not in self.available_segments:
+                    logger.warning(f"Skipping segment {segment[1]:.0f}s - {segment[2]:.0f}s, "
+                                   f"the ring has already overwritten {segment[0]}")
+                    continue
+
+                yield segment
+
+            if not running:
+                break
+
+            time.sleep(poll_interval)
+
+        if self.recording_process is not None and self.recording_process.returncode == 0:
+            logger.info(f"Recording completed successfully ({len(self.segments)} segments)")
+        else:
+            logger.error(f"Recording ended with errors after {len(self.segments)} segments")
+
+    def stop_recording(self) -> None:
+        """Stop a background recording that is still running"""
+        if self.recording_process is not None and self.recording_process.poll() is None:
+            logger.warning("Stopping the recording before its end")
+            self.recording_process.terminate()
+            self.recording_process.wait()
+
+    @property
+    def available_segments(self):
+        """
+        Closed segments whose files are still on disk
+
+        In a ring, the segment being written reuses the file of the oldest one,
+        so only the last ring_size - 1 closed segments can be read. Those are
+        taken from the manifest, since ffmpeg may be ahead of closed_segments.
+        """
+        if not self.ring_size:
+            return self.segments
+
+        return self._read_manifest()[-(self.ring_size - 1):] if self.ring_size > 1 else []
+
+    def _read_manifest(self):
+        """Parse the closed segments listed so far, skipping a partially written last line"""
+        if self.manifest_path is None or not self.manifest_path.exists():
+            return []
+
+        segments = []
+        with open(self.manifest_path, newline="") as manifest:
+            for row in csv.reader(manifest):
+                try:
+                    name, start, end = row
+                    segments.append((str(Path(self.segment_dir.name) / name), float(start), float(end)))
+                except ValueError:
+                    break
+
+        return segments
@@ -0,0 +1,110 @@
+import logging
+import math
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from config import SHARD_WORKERS, DIGIT_MODEL_BACKEND
+
+logger = logging.getLogger(__name__)
+
+
+# VideoService of a worker process, built once by the pool initializer
+_worker_service = None
+
+
+def _init_worker(backend: str):
+    """Worker: load the finder, ROI gate and digit model once per process"""
+    global _worker_service
+
+    from services.video_service import VideoService
+    from video import ScoreboardFinder, ScoreboardReader, VideoLoader, ScoreValidator, RoiChangeGate
+
+    _worker_service = VideoService(ScoreboardFinder(), ScoreboardReader(backend), None, VideoLoader(),
+                                   ScoreValidator(), RoiChangeGate())
+
+
+def _analyze_shard(file_name: str, sample_range: tuple[int, int], region_configs: list[dict], rotation_angle: int,
+                   sample_rate: int):
+    """
+    Worker: read the score regions of one range of samples
+
+    Runs the same crop-only decode, ROI gate and batched scoring as a sequential scan.
+
+    :return: List of Tuple(timestamp, scores per region, confidences per region)
+    """
+    # A shard starts a new stretch of the recording, nothing cached may carry over
+    _worker_service.roi_gate.reset()
+
+    return list(_worker_service.stream_scores(file_name, region_configs, rotation_angle, sample_rate,
+                                              sample_range=sample_range))
+
+
+class ShardedAnalyzer:
+    """
+    Analyze a finished recording in parallel time shards
+
+    The recording is split into one contiguous time range per worker. Shard
+    boundaries fall on sample frames, so the merged reads are exactly the samples a
+    single sequential pass would produce. Each worker process loads the digit
+    model once and scores its range through VideoService.stream_scores, so shards
+    get the same crop-only decode, ROI gate and preprocessing profiles.
+    """
+
+    def __init__(self, video_loader, workers: int = SHARD_WORKERS, backend: str = DIGIT_MODEL_BACKEND):
+        self.video_loader = video_loader
+        self.workers = workers
+        self.backend = backend
+
+    def shard_ranges(self, sample_count: int, first_sample: int = 0) -> list[tuple[int, int]]:
+        """
+        Split samples first_sample .. sample_count - 1 into one Tuple(first, end) range per worker
+
+        The last range is open-ended (end None), so samples past a short frame count are still read.
+        """
+        remaining = sample_count - first_sample
+        if remaining <= 0:
+            return []
+
+        samples_per_shard = math.ceil(remaining / self.workers)
+        starts = list(range(first_sample, sample_count, samples_per_shard))
+
+        return [(start, end) for start, end in zip(starts, starts[1:] + [None])]
+
+    def stream_scores(self, file_name: str, region_configs: list[dict], rotation_angle: int,
+                      sample_rate: int = 1, resume_after: float = None):
+        """
+        Read the score regions of a recording across a process pool
+
+        :param file_name: Recording in the recordings folder
+        :param region_configs: Score regions to read (e.g. home and away)
+        :param rotation_angle: Degrees the regions are rotated by (neg = clockwise)
+        :param sample_rate: Seconds between samples
+        :param resume_after: Only read the samples after this timestamp
+        :return: Generator of Tuple(timestamp, scores per region, confidences per region), in timestamp order
+        """
+        self.video_loader.load_video_info(file_name)
+
+        fps, frame_count = self.video_loader.fps, self.video_loader.frame_count
+        frame_interval = max(int(fps * sample_rate), 1)
+        sample_count = (frame_count - 1) // frame_interval + 1 if frame_count > 0 else 0
+
+        first_sample = 0
+        if resume_after is not None:
+            first_sample = math.floor(resume_after * fps / frame_interval + 1e-6) + 1
+
+        ranges = self.shard_ranges(sample_count, first_sample)
+        if not ranges:
+            logger.warning(f"{file_name} has no samples left to analyze")
+            return
+
+        logger.info(f"Analyzing {file_name} in {len(ranges)} shards")
+
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=len(ranges), mp_context=context,
+                                 initializer=_init_worker, initargs=(self.backend,)) as pool:
+            futures = [pool.submit(_analyze_shard, file_name, sample_range, region_configs, rotation_angle,
+                                   sample_rate)
+                       for sample_range in ranges]
+
+            for future in futures:
+                yield from future.result()
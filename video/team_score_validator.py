@@ -0,0 +1,41 @@
+from config import CONFIDENT_STABLE, UNSURE_STABLE
+from video.score_validator import ScoreValidator
+
+
+class TeamScoreValidator:
+    """
+    Validate home and away scores read from the same frame
+
+    Each team gets its own ScoreValidator, so a goal by either side is
+    confirmed independently of the other side's reads.
+    """
+
+    def __init__(self, required_stable: int = 3, confident_stable: int = CONFIDENT_STABLE,
+                 unsure_stable: int = UNSURE_STABLE):
+        self.home = ScoreValidator(required_stable, confident_stable, unsure_stable)
+        self.away = ScoreValidator(required_stable, confident_stable, unsure_stable)
+
+    def validate_scores(self, home_score: int, away_score: int, home_confidence: float = None,
+                        away_confidence: float = None) -> tuple[bool, bool]:
+        """
+        Feed one frame's reads to both validators
+
+        :return: Tuple(home goal confirmed, away goal confirmed)
+        """
+        return (self.home.validate_score(home_score, home_confidence),
+                self.away.validate_score(away_score, away_confidence))
+
+    def get_last_valid_scores(self) -> tuple[int, int]:
+        return self.home.get_last_valid_score(), self.away.get_last_valid_score()
+
+    def get_state(self) -> dict:
+        return {'home': self.home.get_state(), 'away': self.away.get_state()}
+
+    def load_state(self, state: dict):
+        self.home.load_state(state['home'])
+        self.away.load_state(state['away'])
+
+    def reset(self):
+        """Start a new game from 0 - 0"""
+        self.home.reset()
+        self.away.reset()
@@ -1,25 +1,39 @@
+import json
+import math
 import os
+import shutil
 import subprocess
+import tempfile
 from pathlib import Path
 
 import cv2
 import logging
 import glob
+import numpy as np
 
-from config import RECORDINGS_DIR, CLIPS_DIR
+from config import RECORDINGS_DIR, CLIPS_DIR, CLIP_MODE, ensure_directories
+from video.field_profile import FieldProfile
+from video.ffmpeg_utils import encoder_args, run_ffmpeg, video_stream_header
+from video.screen_recorder import ScreenRecorder
 
 logger = logging.getLogger(__name__)
 
 class VideoLoader:
 
+    # Grab forward up to this far instead of seeking (a seek decodes from the previous keyframe anyway)
+    MAX_GRAB_SECONDS = 4
+
     def __init__(self):
+        ensure_directories()
         self.video = None
         self.fps = None
         self.frame_count = None
         self.duration = None
         self.width = None
         self.height = None
-
+        self.roi_bbox = None
+        self._seek_capture = None
+        self._seek_position = 0
 
     def _load_video_info(self, video_path: Path):
         """Load video metadata"""
@@ -41,9 +55,22 @@ class VideoLoader:
         logger.info(f"\tFPS: {self.fps:.2f}")
         logger.info(f"\tDuration: {self.duration / 60:.1f} minutes ({self.frame_count} frames)")
 
-    def frames_generator(self, file_name, sample_rate: int = 3):
+    def load_video_info(self, file_name: str):
+        """Load metadata of a recording in the recordings folder"""
+        self._load_video_info(self._make_path(RECORDINGS_DIR, file_name))
+
+    def frames_generator(self, file_name, sample_rate: int = 3, sparse: bool = True):
         """
         Yield a frame approximately every `sample_rate` seconds.
+
+        In sparse mode frames between samples are only grabbed (demuxed and
+        decoded) and never retrieved, so the BGR conversion and array copy is
+        paid once per sample instead of once per frame.
+
+        :param file_name: Recording in the recordings folder
+        :param sample_rate: Seconds between yielded frames
+        :param sparse: Skip retrieving frames that are not sampled
+        :return: Generator of Tuple(timestamp, frame)
         """
         logger.info(f"Processing video with sample rate: {sample_rate} seconds")
 
@@ -55,17 +82,23 @@ class VideoLoader:
         if not cap.isOpened():
             raise ValueError(f"Could not open video: {video_path}")
 
-        frame_interval = int(self.fps * sample_rate)
+        frame_interval = max(int(self.fps * sample_rate), 1)
         frame_num = 0
 
         while True:
-            ret, frame = cap.read()
+            is_sample = frame_num % frame_interval == 0
+
+            if sparse and not is_sample:
+                ret, frame = cap.grab(), None
+            else:
+                ret, frame = cap.read()
+
             if not ret:
                 break
 
             timestamp = frame_num / self.fps
 
-            if frame_num % frame_interval == 0:
+            if is_sample:
                 yield timestamp, frame
 
             frame_num += 1
@@ -77,17 +110,205 @@ class VideoLoader:
         cap.release()
         logger.info(f"Processed {frame_num} frames")
 
+    def load_roi_bbox(self, file_name: str, region_configs: list[dict], rotation_angle: int):
+        """
+        Load a recording's metadata and the source bounding box of its score regions
+
+        :return: Tuple(x, y, width, height), also stored in `self.roi_bbox`
+        """
+        self.load_video_info(file_name)
+
+        profile = FieldProfile(rotation_angle, self.width, self.height)
+        self.roi_bbox = profile.source_bbox(region_configs)
+
+        x, y, w, h = self.roi_bbox
+        logger.info(f"\tScoreboard patch: {w}x{h} at ({x}, {y})")
+
+        return self.roi_bbox
+
+    def roi_frames_to_ring(self, ring, file_name: str, region_configs: list[dict], rotation_angle: int,
+                           sample_rate: int = 3, resume_after: float = None):
+        """
+        Decoder process: stream scoreboard patches into a SharedFrameRing
+
+        The ring is always marked finished, even if decoding fails. A failure is
+        re-raised, so the process exit code tells the consumer the stream is short.
+        """
+        try:
+            for timestamp, patch in self.roi_frames_generator(file_name, region_configs, rotation_angle,
+                                                              sample_rate, resume_after):
+                ring.put(timestamp, patch)
+        finally:
+            ring.put_end()
+            ring.close(unlink=False)
+
+    def roi_frames_generator(self, file_name, region_configs: list[dict], rotation_angle: int,
+                             sample_rate: int = 3, resume_after: float = None,
+                             sample_range: tuple[int, int] = None):
+        """
+        Yield only the scoreboard patch approximately every `sample_rate` seconds.
+
+        ffmpeg selects the sampled frames and crops them to the source bounding box
+        of the rotated regions before converting to BGR, so only that patch is ever
+        copied out of the decoder. The patch origin in the full frame is stored in
+        `self.roi_bbox` as Tuple(x, y, width, height). When the recorder also wrote
+        a scoreboard stream covering the box, that small stream is decoded instead
+        of the full recording.
+
+        :param file_name: Recording in the recordings folder
+        :param region_configs: Score regions to cover (e.g. home and away)
+        :param rotation_angle: Degrees the regions are rotated by (neg = clockwise)
+        :param sample_rate: Seconds between yielded patches
+        :param resume_after: Skip every sample up to this timestamp, seeking straight past them
+        :param sample_range: Tuple(first, end) sample numbers to read instead of the whole recording
+        :return: Generator of Tuple(timestamp, patch)
+        """
+        logger.info(f"Processing scoreboard region with sample rate: {sample_rate} seconds")
+
+        video_path = self._make_path(RECORDINGS_DIR, file_name)
+        x, y, w, h = self.load_roi_bbox(file_name, region_configs, rotation_angle)
+
+        input_path, crop_x, crop_y = video_path, x, y
+        roi_stream = self._roi_stream(video_path)
+        if roi_stream is not None:
+            input_path, crop_x, crop_y = roi_stream
+            logger.info(f"\tDecoding the scoreboard stream {input_path.name}")
+
+        frame_interval = max(int(self.fps * sample_rate), 1)
+
+        # Start on the first sample of the range or after `resume_after`, so the select
+        # filter's frame numbers stay aligned with the samples of an uninterrupted pass
+        first_sample, end_sample, seek_args = 0, None, []
+        if sample_range is not None:
+            first_sample, end_sample = sample_range
+        if resume_after is not None:
+            first_sample = max(first_sample, math.floor(resume_after * self.fps / frame_interval + 1e-6) + 1)
+        if first_sample > 0:
+            # Half a frame early, so rounding never skips the first sample frame
+            seek_args = ["-ss", f"{(first_sample * frame_interval - 0.5) / self.fps:.6f}"]
+
+        cmd = [
+            "ffmpeg",
+            "-v", "error",
+            *seek_args,
+            "-i", str(input_path),
+            "-vf", f"select=not(mod(n\\,{frame_interval})),crop={w}:{h}:{crop_x}:{crop_y}",
+            "-fps_mode", "passthrough",
+            "-f", "rawvideo",
+            "-pix_fmt", "bgr24",
+            "pipe:1",
+        ]
+
+        patch_size = w * h * 3
+        sample_num = first_sample
+
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        reached_end = False
+        try:
+            while end_sample is None or sample_num < end_sample:
+                buffer = process.stdout.read(patch_size)
+                if len(buffer) < patch_size:
+                    reached_end = True
+                    break
+
+                timestamp = sample_num * frame_interval / self.fps
+                patch = np.frombuffer(buffer, dtype=np.uint8).reshape(h, w, 3)
+
+                yield timestamp, patch
+
+                sample_num += 1
+        finally:
+            process.stdout.close()
+            if not reached_end and process.poll() is None:
+                process.kill()
+            process.wait()
+
+        # ffmpeg closing its output early looks like the end of the recording
+        if reached_end and process.returncode != 0:
+            raise RuntimeError(f"ffmpeg failed decoding {file_name} after {sample_num - first_sample} patches "
+                               f"(exit code {process.returncode})")
+
+        logger.info(f"Processed {sample_num - first_sample} scoreboard patches")
+
+    def _roi_stream(self, video_path: Path):
+        """
+        Scoreboard stream recorded next to a recording, if it covers `self.roi_bbox`
+
+        :return: Tuple(stream path, x, y of `self.roi_bbox` within the stream), or None
+        """
+        roi_path, placement_path = ScreenRecorder.roi_stream_paths(video_path)
+        if not roi_path.exists() or not placement_path.exists():
+            return None
+
+        with open(placement_path) as f:
+            placement = json.load(f)
+
+        x, y, w, h = self.roi_bbox
+        roi_x, roi_y, roi_w, roi_h = placement['bbox']
+
+        if placement['frame_size'] != [self.width, self.height] or not (
+                roi_x <= x and roi_y <= y and x + w <= roi_x + roi_w and y + h <= roi_y + roi_h):
+            logger.info(f"\tScoreboard stream {roi_path.name} does not cover the regions, decoding the full recording")
+            return None
+
+        return roi_path, x - roi_x, y - roi_y
+
+    def open_seekable(self, file_name: str):
+        """Open a recording for random access with `read_frame_at`"""
+        video_path = self._make_path(RECORDINGS_DIR, file_name)
+
+        self._load_video_info(video_path)
+
+        self._seek_capture = cv2.VideoCapture(str(video_path))
+        if not self._seek_capture.isOpened():
+            raise ValueError(f"Could not open video: {video_path}")
+
+        self._seek_position = 0
+
+    def read_frame_at(self, frame_num: int):
+        """
+        Decode a single frame of the recording opened with `open_seekable`
+
+        Nearby frames ahead are reached by grabbing forward, anything else by seeking.
+
+        :param frame_num: Frame index
+        :return: Frame, or None if it could not be decoded
+        """
+        distance = frame_num - self._seek_position
+
+        if distance < 0 or distance > self.fps * self.MAX_GRAB_SECONDS:
+            self._seek_capture.set(cv2.CAP_PROP_POS_FRAMES, frame_num)
+        else:
+            for _ in range(distance):
+                self._seek_capture.grab()
+
+        ret, frame = self._seek_capture.read()
+        self._seek_position = frame_num + 1
+
+        return frame if ret else None
+
+    def close_seekable(self):
+        if self._seek_capture is not None:
+            self._seek_capture.release()
+            self._seek_capture = None
+
+    def has_recording(self, file_name: str) -> bool:
+        return self._make_path(RECORDINGS_DIR, file_name).exists()
+
     def delete_video(self, file_name: str, all_files: bool = False):
         """Clean up the recordings folder"""
         video_path = self._make_path(RECORDINGS_DIR, file_name)
 
         if all_files and video_path.parent.exists():
-            files_to_delete = glob.glob(f"{video_path.parent}/*.mp4")
+            files_to_delete = (glob.glob(f"{video_path.parent}/*.mp4") + glob.glob(f"{video_path.parent}/*.keyframes.json")
+                               + glob.glob(f"{video_path.parent}/*.roi.json"))
             for file in files_to_delete:
                 os.remove(file)
 
-        elif video_path.exists():
-            os.remove(video_path)
+        else:
+            for path in (video_path, self._keyframe_index_path(video_path), *ScreenRecorder.roi_stream_paths(video_path)):
+                if path.exists():
+                    os.remove(path)
 
     @staticmethod
     def _make_path(directory: str, file_name: str) -> Path:
@@ -95,6 +316,8 @@ class VideoLoader:
 
 
     def clip_video(self, file_name: str, clip_file_name: str, start_time: int, duration: int) -> bool:
+        if CLIP_MODE == "smart":
+            return self.smart_clip_video(file_name, clip_file_name, start_time, duration)
 
         file_path = self._make_path(RECORDINGS_DIR, file_name)
         clip_file_path = self._make_path(CLIPS_DIR, clip_file_name)
@@ -121,6 +344,275 @@ class VideoLoader:
         logger.info(f"Clip created: {clip_file_name}")
         return True
 
+    def clip_videos(self, file_name: str, clips: list[tuple[str, float, float]]) -> bool:
+        """
+        Cut every clip of a recording with a single ffmpeg run
+
+        Each clip is its own input (seeked to its keyframe like `clip_video`) mapped
+        to its own stream-copied output. The recording is still opened and probed
+        once per clip, but one process start and one pass over the outputs replace
+        a process per clip. If the batch fails, each clip is cut on its own with
+        `clip_video`, so one bad clip does not lose the others. In "smart"
+        CLIP_MODE every clip is cut frame-accurately with `smart_clip_video` instead.
+
+        :param file_name: Recording in the recordings folder
+        :param clips: Tuple(clip file name, start seconds, duration seconds) per clip
+        :return: True if every clip was created
+        """
+        # A goal in the first seconds of the recording starts its clip before 0
+        clips = [(clip_file_name, max(start_time, 0), duration + min(start_time, 0))
+                 for clip_file_name, start_time, duration in clips]
+
+        if not clips:
+            return True
+
+        if CLIP_MODE == "smart":
+            created = [self.smart_clip_video(file_name, clip_file_name, start_time, duration)
+                       for clip_file_name, start_time, duration in clips]
+            return all(created)
+
+        file_path = self._make_path(RECORDINGS_DIR, file_name)
+
+        cmd = ["ffmpeg", "-y"]
+        for _, start_time, _ in clips:
+            cmd += ["-ss", str(start_time), "-i", str(file_path)]
+
+        for index, (clip_file_name, _, duration) in enumerate(clips):
+            cmd += ["-map", str(index), "-t", str(duration), "-c", "copy",
+                    str(self._make_path(CLIPS_DIR, clip_file_name))]
+
+        result = subprocess.run(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+
+        if result.returncode != 0:
+            logger.warning(f"FFmpeg batch clip failed, cutting the clips one by one:\n{result.stderr.decode()}")
+            created = [self.clip_video(file_name, clip_file_name, start_time, duration)
+                       for clip_file_name, start_time, duration in clips]
+            return all(created)
+
+        logger.info(f"Clips created: {', '.join(clip_file_name for clip_file_name, _, _ in clips)}")
+        return True
+
+    @staticmethod
+    def _keyframe_index_path(video_path: Path) -> Path:
+        return video_path.with_suffix(".keyframes.json")
+
+    def keyframe_index(self, file_name: str) -> dict:
+        """
+        Keyframe timestamps of a recording, built once and cached next to it
+
+        The index comes from the packet flags of the container, so nothing is
+        decoded. It is rebuilt when the recording is newer than the cache.
+
+        :param file_name: Recording in the recordings folder
+        :return: Dict(fps, keyframes) with keyframe presentation times in seconds, ascending
+        """
+        video_path = self._make_path(RECORDINGS_DIR, file_name)
+        index_path = self._keyframe_index_path(video_path)
+
+        if index_path.exists() and index_path.stat().st_mtime >= video_path.stat().st_mtime:
+            with open(index_path) as f:
+                return json.load(f)
+
+        cmd = [
+            "ffprobe",
+            "-v", "error",
+            "-select_streams", "v:0",
+            "-show_entries", "packet=pts_time,flags",
+            "-of", "csv=p=0",
+            str(video_path),
+        ]
+
+        result = subprocess.run(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+
+        if result.returncode != 0:
+            raise RuntimeError(f"ffprobe keyframe scan failed:\n{result.stderr}")
+
+        packets = (line.split(",") for line in result.stdout.splitlines() if line)
+        keyframes = sorted(float(pts_time) for pts_time, flags, *_ in packets
+                           if flags.startswith("K") and pts_time != "N/A")
+
+        capture = cv2.VideoCapture(str(video_path))
+        fps = capture.get(cv2.CAP_PROP_FPS)
+        capture.release()
+
+        index = {"fps": fps, "keyframes": keyframes}
+        with open(index_path, 'w') as f:
+            json.dump(index, f)
+
+        logger.info(f"Indexed {len(keyframes)} keyframes of {file_name}")
+        return index
+
+    def smart_clip_video(self, file_name: str, clip_file_name: str, start_time: float, duration: float) -> bool:
+        """
+        Frame-accurate clip that only re-encodes the partial GOP at its head
+
+        The frames from `start_time` up to the first keyframe after it are
+        re-encoded with the recorder's encoder settings, everything from that
+        keyframe on is stream-copied, and the two parts are joined with the
+        concat demuxer. A clip starting on a keyframe is copied outright; one
+        with no keyframe inside it is short enough to re-encode whole, and so
+        is one whose recording has a codec header the head cannot match.
+
+        :param file_name: Recording in the recordings folder
+        :param clip_file_name: Clip to write in the clips folder
+        :param start_time: Clip start in seconds
+        :param duration: Clip length in seconds
+        :return: True if the clip was created
+        """
+        file_path = self._make_path(RECORDINGS_DIR, file_name)
+        clip_file_path = self._make_path(CLIPS_DIR, clip_file_name)
+
+        index = self.keyframe_index(file_name)
+        fps = index["fps"]
+        start_time = max(start_time, 0)
+        end_time = start_time + duration
+
+        # Half a frame of slack, since probed timestamps are rounded
+        head_end = next((keyframe for keyframe in index["keyframes"] if keyframe > start_time - 0.5 / fps), None)
+
+        if head_end is None or head_end > end_time - 0.5 / fps:
+            method = "re-encoded"
+            created = self._encode_clip(file_path, clip_file_path, start_time, round(duration * fps))
+
+        elif head_end - start_time < 0.5 / fps:
+            method = "stream copy"
+            created = self._copy_clip(file_path, clip_file_path, head_end, end_time - head_end)
+
+        else:
+            method = f"re-encoded {head_end - start_time:.2f}s head"
+            with tempfile.TemporaryDirectory() as work_dir:
+                head_path = Path(work_dir) / "head.mp4"
+                tail_path = Path(work_dir) / "tail.mp4"
+                concat_path = Path(work_dir) / "concat.txt"
+
+                created = (self._encode_clip(file_path, head_path, start_time, round((head_end - start_time) * fps))
+                           and self._copy_clip(file_path, tail_path, head_end, end_time - head_end))
+
+                # A recording made with other encoder settings has a different SPS/PPS
+                # than the head, and the joined clip would not decode past the head
+                if created and video_stream_header(head_path) != video_stream_header(tail_path):
+                    logger.warning(f"{file_name} was not encoded like the clip head, re-encoding {clip_file_name}")
+                    method = "re-encoded, recording codec differs"
+                    created = self._encode_clip(file_path, clip_file_path, start_time, round(duration * fps))
+
+                elif created:
+                    concat_path.write_text(f"file '{head_path}'\nfile '{tail_path}'\n")
+                    created = run_ffmpeg([
+                        "ffmpeg",
+                        "-y",
+                        "-f", "concat",
+                        "-safe", "0",
+                        "-i", str(concat_path),
+                        "-c", "copy",
+                        str(clip_file_path),
+                    ], "smart clip join")
+
+        if created:
+            logger.info(f"Clip created: {clip_file_name} ({method})")
+        return created
+
+    def _encode_clip(self, file_path: Path, output_path: Path, start_time: float, frame_count: int) -> bool:
+        """Re-encode `frame_count` frames from exactly `start_time`, with the recorder's encoder settings"""
+        return run_ffmpeg([
+            "ffmpeg",
+            "-y",
+            "-ss", f"{start_time:.6f}",
+            "-i", str(file_path),
+            "-map", "0:v:0",
+            "-frames:v", str(frame_count),
+            *encoder_args(),
+            str(output_path),
+        ], "smart clip head encode")
+
+    def _copy_clip(self, file_path: Path, output_path: Path, keyframe: float, duration: float) -> bool:
+        """Stream-copy `duration` seconds starting at a keyframe"""
+        return run_ffmpeg([
+            "ffmpeg",
+            "-y",
+            "-ss", f"{keyframe:.6f}",
+            "-i", str(file_path),
+            "-map", "0:v:0",
+            "-t", f"{duration:.6f}",
+            "-c", "copy",
+            "-avoid_negative_ts", "make_zero",
+            str(output_path),
+        ], "smart clip copy")
+
+    def clip_segments(self, segments: list[tuple[str, float, float]], clip_file_name: str, start_time: float,
+                      duration: float) -> bool:
+        """
+        Clip a window out of a segmented recording without waiting for it to finish
+
+        :param segments: Closed segments as Tuple(file relative to recordings folder, start, end)
+        :param clip_file_name: Clip to write in the clips folder
+        :param start_time: Clip start, in seconds from the start of the recording
+        :param duration: Clip length in seconds
+        :return: True if the clip was created
+        """
+        end_time = start_time + duration
+        covering = [segment for segment in segments if segment[2] > start_time and segment[1] < end_time]
+
+        if not covering:
+            logger.error(f"No recorded segments cover {start_time:.1f}s - {end_time:.1f}s")
+            return False
+
+        if covering[0][1] > start_time:
+            logger.warning(f"Clip {clip_file_name} starts late at {covering[0][1]:.1f}s")
+
+        if covering[-1][2] < end_time:
+            logger.warning(f"Clip {clip_file_name} truncated at {covering[-1][2]:.1f}s")
+
+        clip_file_path = self._make_path(CLIPS_DIR, clip_file_name)
+
+        with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as concat_list:
+            for segment_file, _, _ in covering:
+                segment_path = self._make_path(RECORDINGS_DIR, segment_file).resolve()
+                concat_list.write(f"file '{segment_path}'\n")
+
+        cmd = [
+            "ffmpeg",
+            "-y",
+            "-f", "concat",
+            "-safe", "0",
+            "-ss", str(max(start_time - covering[0][1], 0)),
+            "-i", concat_list.name,
+            "-t", str(duration),
+            "-c", "copy",
+            clip_file_path,
+        ]
+
+        try:
+            result = subprocess.run(
+                cmd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+            )
+        finally:
+            os.remove(concat_list.name)
+
+        if result.returncode != 0:
+            logger.error(f"FFmpeg clip failed:\n{result.stderr.decode()}")
+            return False
+
+        logger.info(f"Clip created: {clip_file_name}")
+        return True
+
+    def delete_segments(self, segment_dir_name: str):
+        """Remove a segmented recording folder"""
+        segment_dir = self._make_path(RECORDINGS_DIR, segment_dir_name)
+
+        if segment_dir.is_dir():
+            shutil.rmtree(segment_dir)
+
     @staticmethod
     def count_clips():
         return len([name for name in os.listdir(CLIPS_DIR) if os.path.isfile(os.path.join(CLIPS_DIR, name))])
\ No newline at end of file